@@ -0,0 +1,155 @@
+from __future__ import annotations
+from array import array
+from dataclasses import dataclass, field
+from time import perf_counter_ns
+from typing import Dict, List, Tuple
+import pygame
+from colors import Colors, Color
+
+PHASES = ('events', 'update', 'draw', 'flip', 'tick', 'idle')
+# solved_cells and solver_us add up the solver runs (see Solver.SolverStats) each frame
+COUNTERS = ('blits', 'regenerations', 'solved_cells', 'solver_us')
+# where the overlay goes on screen
+OVERLAY_POS = (8, 8)
+
+@dataclass
+class FrameStats:
+    """
+    Per-phase frame timings (perf_counter_ns) and per-frame counters kept in
+    fixed-size ring buffers, so recording a frame never allocates.
+
+    Usage per frame: begin(phase)/end(phase) around each phase, count() from the
+    code doing the work, then end_frame().
+
+    Time spent in the 'idle' phase (waiting for events) and the rest of each frame
+    are also added up over the whole run in idle_ns and active_ns, and the rate
+    of the last solver run is kept in solver_cells_per_sec.
+    """
+    size: int = 300
+    phases: Tuple[str, ...] = PHASES
+    counters: Tuple[str, ...] = COUNTERS
+
+    frames: int = 0
+    idle_ns: int = 0
+    active_ns: int = 0
+    solver_cells_per_sec: float = 0.0
+    timings: Dict[str, array] = field(init=False)
+    counts: Dict[str, array] = field(init=False)
+    _started: Dict[str, int] = field(init=False)
+    _frame_start: int = field(init=False)
+
+    def __post_init__(self):
+        self.timings = {p: array('q', [0]) * self.size for p in self.phases + ('frame',)}
+        self.counts = {c: array('q', [0]) * self.size for c in self.counters}
+        self._started = {p: 0 for p in self.phases}
+        self._frame_start = perf_counter_ns()
+
+    @property
+    def slot(self) -> int:
+        return self.frames % self.size
+
+    def begin(self, phase: str) -> None:
+        self._started[phase] = perf_counter_ns()
+
+    def end(self, phase: str) -> None:
+        self.timings[phase][self.slot] = perf_counter_ns() - self._started[phase]
+
+    def count(self, counter: str, n: int = 1) -> None:
+        self.counts[counter][self.slot] += n
+
+    def solver_run(self, cells: int, seconds: float) -> None:
+        self.count('solved_cells', cells)
+        self.count('solver_us', round(seconds * 1e6))
+        self.solver_cells_per_sec = cells / seconds if seconds else 0.0
+
+    def end_frame(self) -> None:
+        now = perf_counter_ns()
+        frame_ns = now - self._frame_start
+        self.timings['frame'][self.slot] = frame_ns
+        self._frame_start = now
+        idle_ns = self.timings['idle'][self.slot] if 'idle' in self.timings else 0
+        self.idle_ns += idle_ns
+        self.active_ns += frame_ns - idle_ns
+        self.frames += 1
+        # clear the slot the next frame will write into
+        slot = self.slot
+        for p in self.phases:
+            self.timings[p][slot] = 0
+        for c in self.counters:
+            self.counts[c][slot] = 0
+
+    def recorded(self) -> int:
+        # the slot of the frame in progress doesn't count as recorded
+        return min(self.frames, self.size - 1)
+
+    def recent(self, values: array) -> array:
+        """
+        Returns the values of the recorded frames in `values`, oldest first.
+        """
+        if self.frames < self.size:
+            return values[:self.frames]
+        slot = self.slot
+        return values[slot + 1:] + values[:slot]
+
+    def last_ms(self, phase: str) -> float:
+        if self.frames == 0:
+            return 0.0
+        return self.timings[phase][(self.frames - 1) % self.size] / 1e6
+
+    def mean_ms(self, phase: str) -> float:
+        n = self.recorded()
+        return sum(self.recent(self.timings[phase])) / n / 1e6 if n else 0.0
+
+    def max_ms(self, phase: str) -> float:
+        n = self.recorded()
+        return max(self.recent(self.timings[phase])) / 1e6 if n else 0.0
+
+    def lines(self) -> List[str]:
+        frame_ms = self.mean_ms('frame')
+        fps = 1000 / frame_ms if frame_ms else 0.0
+        lines = [f'frame {frame_ms:6.2f} ms  max {self.max_ms("frame"):6.2f} ms  {fps:5.1f} fps']
+        for p in self.phases:
+            lines.append(f'{p:<8}{self.mean_ms(p):6.2f} ms  max {self.max_ms(p):6.2f} ms')
+        last = (self.frames - 1) % self.size
+        lines.append('  '.join(f'{c} {self.counts[c][last]}' for c in self.counters))
+        lines.append(f'idle {self.idle_fraction() * 100:5.1f}%  ({self.idle_ns / 1e9:.1f} s idle, {self.active_ns / 1e9:.1f} s active)')
+        if self.solver_cells_per_sec:
+            lines.append(f'solver {self.solver_cells_per_sec:,.0f} cells/s (last run)')
+        return lines
+
+    def idle_fraction(self) -> float:
+        total = self.idle_ns + self.active_ns
+        return self.idle_ns / total if total else 0.0
+
+    def render_overlay(self, font: pygame.font.Font, color: Color = Colors.WHITE,
+                       background: Color = Color(0.0, 0.0, 0.0, 0.6)) -> pygame.Surface:
+        rendered = [font.render(line, True, color.get()) for line in self.lines()]
+        w = max(r.get_width() for r in rendered) + 8
+        h = sum(r.get_height() for r in rendered) + 8
+        overlay = pygame.Surface((w, h), pygame.SRCALPHA)
+        overlay.fill(background.get())
+        x, y = 4, 4
+        for r in rendered:
+            overlay.blit(r, (x, y))
+            y += r.get_height()
+        return overlay
+
+    def draw_overlay(self, surface: pygame.Surface, font: pygame.font.Font, pos: Tuple[int, int] = OVERLAY_POS,
+                     color: Color = Colors.WHITE, background: Color = Color(0.0, 0.0, 0.0, 0.6)) -> pygame.Rect:
+        return surface.blit(self.render_overlay(font, color, background), pos)
+
+    def export_csv(self, path: str) -> None:
+        """
+        Writes the recorded frames, oldest first, with timings in milliseconds.
+        """
+        n = self.recorded()
+        columns = ('frame',) + self.phases
+        timings = [self.recent(self.timings[c]) for c in columns]
+        counts = [self.recent(self.counts[c]) for c in self.counters]
+        with open(path, 'w') as f:
+            f.write(','.join(['frame_number'] + [f'{c}_ms' for c in columns] + list(self.counters)) + '\n')
+            for i in range(n):
+                row = [str(self.frames - n + i)]
+                row += [f'{t[i] / 1e6:.4f}' for t in timings]
+                row += [str(c[i]) for c in counts]
+                f.write(','.join(row) + '\n')
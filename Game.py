@@ -1,30 +1,69 @@
 import os
+import math
+from array import array
+from itertools import accumulate
 from dataclasses import dataclass, field
-from typing import Callable, List, Dict, Any, Literal
-from json import loads
+from typing import Callable, List, Dict, Any, Literal, Tuple
+from json import loads, dumps, JSONDecodeError
 import pygame
 from font import FontStore, FontUseType, _Font, _SysFont
 from colors import Colors, Color
 from Keyboard import Keyboard
 from Mouse import Mouse
-from _math import Vec2, clamp
+from _math import Vec2, Vec2Array, clamp
 from Shape import Shape
-from random import choice
-
-@dataclass
+from random import Random
+import numpy as np
+import wang
+import classify
+import parallel
+import export
+import tilepack
+from World import World
+from FrameStats import FrameStats, OVERLAY_POS
+from Viewport import Viewport, scale
+from Pregenerator import Pregenerator
+from Solver import Solver, SolverStats
+
+# bump when the meaning of the sides stored in the setup manifest changes
+MANIFEST_VERSION = 2
+# optional file in a tile set directory mapping tile file names to weights,
+# e.g. {"3.png": 4, "7.png": 0.5}; it ships with the tile set, unlike setup.json
+TILE_WEIGHTS_FILE = 'weights.json'
+
+# posted when background work (see Pregenerator) finishes, to wake an idle main loop
+BACKGROUND_DONE = pygame.event.custom_type()
+
+@dataclass(slots=True)
 class Sides:
     n: int = 0
     e: int = 0
     w: int = 0
     s: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class Tile:
     surface: pygame.Surface
     sides: Sides
     filepath: str
-    x: int = 0
-    y: int = 0
+    # where the tile lives in Game.tile_atlas; surface is a subsurface of the atlas
+    atlas_rect: pygame.Rect = None
+    # relative odds of this tile being picked among the ones that fit, set per
+    # tile in the tile set's TILE_WEIGHTS_FILE
+    weight: float = 1.0
+
+@dataclass(slots=True)
+class PreparedGrid:
+    """
+    A grid generated (and optionally rendered) ahead of time by Game.prepare_grid.
+    """
+    width: int
+    height: int
+    grid_tiles: array
+    surface: pygame.Surface = None
+    blits: List[Tuple[pygame.Surface, Tuple[int, int]]] = None
+    # set when the solver made the grid
+    solver_stats: SolverStats = None
 
 @dataclass
 class Game:
@@ -32,7 +71,7 @@ class Game:
     screen_height: int
     screen: pygame.display = None
 
-    font_store: FontStore = FontStore()
+    font_store: FontStore = field(default_factory=FontStore)
 
     game_started: bool = False
     running: bool = True
@@ -58,20 +97,100 @@ class Game:
     tile_count_w: int = 0
     tile_count_h: int = 0
     tiles: List[Tile] = field(default_factory=list)
+    tile_sets_dir: str = './tile_sets'
+    tile_atlas: pygame.Surface = None
+    # a pack written by tilepack.py; when set, tiles, sides and weights come from
+    # it instead of tile_sets_dir, its weights file and the setup manifest
+    tile_pack_path: str = None
+    tile_pack: tilepack.TilePack = None
     
     grid_size_px: int = 32
-    grid_tiles: List[pygame.Surface] = field(default_factory=list)
-
-    color_1: Any = None
+    # one entry per cell holding an index into tiles (or empty_tile), row-major;
+    # typecode 'B' for up to 255 tiles, 'H' beyond that
+    grid_tiles: array = None
+    empty_tile: int = 0xFF
+
+    # the rendered grid is cached; only cells in dirty_cells get re-blitted, and
+    # grid_dirty forces a full rebuild (e.g. after create_wang_tiles)
+    grid_surface: pygame.Surface = None
+    grid_dirty: bool = True
+    dirty_cells: set = field(default_factory=set)
+    # one (surface, dest) pair per cell (None for empty cells), fed to Surface.blits
+    grid_positions: List[Tuple[int, int]] = field(default_factory=list)
+    grid_blits: List[Tuple[pygame.Surface, Tuple[int, int]]|None] = field(default_factory=list)
+
+    # draw() only redraws what changed since the last frame: changed_cells, and
+    # the overlays' old and new rects. screen_dirty or a different screen, camera
+    # or zoom (last_view) redraws everything
+    screen_dirty: bool = True
+    changed_cells: set = field(default_factory=set)
+    overlay_rects: List[pygame.Rect] = field(default_factory=list)
+    last_view: Tuple = None
+
+    # cells that fell off the grid when the window shrank, (col, row) -> tile index;
+    # put back when they come into view again so the map doesn't change under the
+    # user. Past grid_archive_limit cells it's dropped and new cells are generated
+    grid_archive: Dict[Tuple[int, int], int] = field(default_factory=dict)
+    grid_archive_limit: int = 1 << 20
+
+    # edge colors found by the classifier; a tile's sides hold ids into this list.
+    # edge_color_count forces that many colors (k-means), otherwise colors further
+    # apart than edge_color_tolerance (RGB distance) are told apart
+    edge_palette: List[Tuple[int, int, int]] = field(default_factory=list)
+    edge_color_count: int = None
+    edge_color_tolerance: float = 32.0
+
+    # tile set manifest read from / written to the setup file by load_setup; tiles
+    # whose file size and mtime still match their entry skip edge classification
+    setup_file_path: str = None
+    manifest: Dict[str, Any] = field(default_factory=dict)
+    manifest_changed: bool = False
 
     placed: int = 0
 
     tile_index: int = 0
 
-    candidate_tiles: List[Tile] = field(default_factory=list)
-
-    check_tile_west: Tile = None
-    check_tile_north: Tile = None
+    candidate_tiles: List[int] = field(default_factory=list)
+    tile_lookup: Dict[Tuple[int|None, int|None], List[int]] = field(default_factory=dict)
+    tile_lookup_weights: Dict[Tuple[int|None, int|None], List[float]] = field(default_factory=dict)
+    tile_signatures: wang.SignatureTable = None
+
+    # 'sequential' walks the grid cell by cell, 'vectorized' samples every edge at once
+    # with NumPy (needs a complete tile set), 'parallel' does the same in strips over
+    # parallel_workers processes, 'solver' runs the constraint solver. The others
+    # fall back to the solver when the tile set can't fill the grid.
+    generator_mode: Literal['sequential', 'vectorized', 'parallel', 'solver'] = 'sequential'
+    parallel_workers: int = None
+    solver_stats: SolverStats = None
+    seed: int = None
+    rng: Random = None
+    np_rng: np.random.Generator = None
+
+    # cell indices of the neighbours the last get_rand_tile call checked
+    check_tile_west: int = None
+    check_tile_north: int = None
+
+    # world mode replaces the fixed screen-sized grid with an unbounded, lazily
+    # generated map scrolled with the arrow keys or by dragging with the mouse
+    world_mode: bool = False
+    world: World = None
+    world_chunk_size: int = 32
+    world_memory_budget: int = 64 * 1024 * 1024
+    camera: Vec2 = field(default_factory=Vec2)
+    scroll_speed: int = 16
+    # zoom (mouse wheel) and culling for the grid; the camera pans it, see Viewport
+    viewport: Viewport = None
+
+    # with pregenerate_depth > 0 that many upcoming grids are generated (and, with
+    # pregenerate_render, rendered) on a background thread, and a click swaps the
+    # next one in instead of generating it on the spot
+    pregenerate_depth: int = 0
+    pregenerate_render: bool = True
+    pregenerator: Pregenerator = None
+
+    # optional frame instrumentation, see main.py
+    stats: FrameStats = None
+    show_stats: bool = False
 
     def __post_init__(self):
         pygame.font.init()
@@ -79,52 +198,521 @@ class Game:
         self.keyboard = Keyboard()
         self.mouse = Mouse()
 
-        self.tile_count_h = self.screen_height // self.tile_h
-        self.tile_count_w = self.screen_width // self.tile_w
+        # at least one cell, even on a screen smaller than a tile
+        self.tile_count_h = max(1, self.screen_height // self.tile_h)
+        self.tile_count_w = max(1, self.screen_width // self.tile_w)
+        self.viewport = Viewport(self.tile_w, self.tile_h)
+
+        self.reseed(self.seed)
+
+    def reseed(self, seed: int = None) -> None:
+        self.seed = seed
+        self.rng = Random(seed)
+        self.np_rng = np.random.default_rng(seed)
 
     def __post_setup__(self):
         self.register_sys_font('Consolas', 16, FontUseType.DEFAULT)
-        tile_sets_dir = './tile_sets'
-        for i in range(self.tile_count):
-            fp = os.path.join(tile_sets_dir, f'{i}.png')
-            img = pygame.image.load(fp)
-            n_color = img.get_at((self.tile_w//2, 1))
-            e_color = img.get_at((self.tile_w-1, self.tile_h//2))
-            s_color = img.get_at((self.tile_w//2, self.tile_h-1))
-            w_color = img.get_at((1, self.tile_h//2))
+        if self.tile_pack_path is not None:
+            self.load_tile_pack(self.tile_pack_path)
+        else:
+            self.load_tile_files()
+        self.viewport.clear()
+
+        self.build_tile_lookup()
+
+        self.grid_tiles = self.new_grid(self.tile_count_w*self.tile_count_h)
+        self.create_wang_tiles()
 
-            if self.color_1 is None:
-                self.color_1 = n_color
+        if self.pregenerate_depth > 0 and not self.world_mode:
+            self.pregenerator = Pregenerator(self.prepare_grid, Random(self.rng.getrandbits(63)), self.pregenerate_depth,
+                                             self.background_done)
+
+        if self.world_mode:
+            self.world = World(self.tiles, self.tile_signatures, self.rng.getrandbits(63),
+                               self.world_chunk_size, self.world_chunk_size,
+                               self.tile_w, self.tile_h, self.world_memory_budget)
+
+    def load_tile_files(self) -> None:
+        """
+        Loads the tiles from tile_sets_dir, classifying the edges of any tile the
+        setup manifest doesn't have up to date sides for. Files that aren't
+        tile_w x tile_h are smoothscaled to it; their edges are still read at
+        the file's own size, where they don't blur into each other.
+        """
+        cached_tiles = self.manifest.get('tiles', {})
+        if (self.manifest.get('version') != MANIFEST_VERSION
+                or (self.manifest.get('tile_w'), self.manifest.get('tile_h')) != (self.tile_w, self.tile_h)
+                or (self.edge_color_count is not None and len(self.manifest.get('palette', [])) != self.edge_color_count)):
+            cached_tiles = {}
+        if cached_tiles and not self.edge_palette:
+            self.edge_palette = [tuple(c) for c in self.manifest['palette']]
+        manifest_tiles = {}
+        unclassified = []
+        images = []
+        weights = self.load_tile_weights()
 
-            s = Sides()
+        for i in range(self.tile_count):
+            fp = os.path.join(self.tile_sets_dir, f'{i}.png')
+            stat = os.stat(fp)
+            img = pygame.image.load(fp)
+            images.append(img)
+            if img.get_size() != (self.tile_w, self.tile_h):
+                img = scale(img, (self.tile_w, self.tile_h))
 
-            if n_color == self.color_1:
-                s.n = 1
-            if e_color == self.color_1:
-                s.e = 1
-            if s_color == self.color_1:
-                s.s = 1
-            if w_color == self.color_1:
-                s.w = 1
+            entry = cached_tiles.get(fp)
+            if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                s = Sides(**entry['sides'])
+            else:
+                s = Sides()
+                entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+                unclassified.append(i)
+                self.manifest_changed = True
+            manifest_tiles[fp] = entry
 
-            tile = Tile(img, s, fp)
+            tile = Tile(img, s, fp, weight=weights.get(f'{i}.png', 1.0))
 
             self.tiles.append(tile)
 
-        self.grid_tiles = [None for _ in range(self.tile_count_w*self.tile_count_h)]
-        self.create_wang_tiles()
+        self.build_tile_atlas()
+        scaled = any(img.get_size() != (self.tile_w, self.tile_h) for img in images)
+        self.classify_tiles(unclassified, images if scaled else None)
+
+        for t in self.tiles:
+            manifest_tiles[t.filepath]['sides'] = {'n': t.sides.n, 'e': t.sides.e, 's': t.sides.s, 'w': t.sides.w}
+        if manifest_tiles.keys() != cached_tiles.keys():
+            self.manifest_changed = True
+        self.manifest = {
+            'version': MANIFEST_VERSION,
+            'tile_w': self.tile_w,
+            'tile_h': self.tile_h,
+            'palette': [list(c) for c in self.edge_palette],
+            'tiles': manifest_tiles,
+        }
+
+    def load_tile_weights(self) -> Dict[str, float]:
+        """
+        Returns the weights from the tile set's TILE_WEIGHTS_FILE, by tile file
+        name; tiles it doesn't list weigh 1.
+        """
+        path = os.path.join(self.tile_sets_dir, TILE_WEIGHTS_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            try:
+                weights = loads(f.read())
+            except JSONDecodeError as e:
+                raise ValueError(f'{path} is not valid JSON: {e}')
+        if not isinstance(weights, dict) or not all(isinstance(w, (int, float)) and w >= 0 for w in weights.values()):
+            raise ValueError(f'{path} must map tile file names to weights of 0 or more!')
+        return {name: float(w) for name, w in weights.items()}
+
+    def load_tile_pack(self, path: str) -> None:
+        """
+        Loads the tiles from a tile pack. The atlas comes straight from the memory
+        map, with no PNG decoding or classification.
+        """
+        pack = tilepack.load(path)
+        if (pack.tile_w, pack.tile_h) != (self.tile_w, self.tile_h):
+            raise ValueError(f'{path} holds {pack.tile_w}x{pack.tile_h} tiles, expected {self.tile_w}x{self.tile_h}!')
+
+        atlas = pack.atlas()
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            atlas = atlas.convert_alpha() if pack.pixel_format in tilepack.ALPHA_FORMATS else atlas.convert()
+
+        self.tile_pack = pack
+        self.tile_atlas = atlas
+        self.tile_count = pack.tile_count
+        self.edge_palette = list(pack.palette)
+        self.tiles = []
+        for i, ((n, e, s, w), weight, name) in enumerate(zip(pack.sides, pack.weights, pack.names)):
+            rect = pack.rect(i)
+            self.tiles.append(Tile(atlas.subsurface(rect), Sides(n=n, e=e, s=s, w=w),
+                                   os.path.join(pack.source, name), rect, weight))
+
+    def classify_tiles(self, tile_indices: List[int], images: List[pygame.Surface] = None) -> None:
+        """
+        Reads the edge strips of the given tiles from the atlas in one go and
+        clusters them into edge colors, extending edge_palette as needed.
+        With `images` (one per tile, all the same size) the strips are read from
+        those instead, e.g. the tiles at their native size.
+        """
+        if not tile_indices:
+            return
+        if images is None:
+            atlas = self.tile_atlas
+            rects = [self.tiles[i].atlas_rect for i in tile_indices]
+        else:
+            w, h = images[tile_indices[0]].get_size()
+            atlas = pygame.Surface((w * len(tile_indices), h), pygame.SRCALPHA)
+            rects = [pygame.Rect(j * w, 0, w, h) for j in range(len(tile_indices))]
+            atlas.blits([(images[i], r) for i, r in zip(tile_indices, rects)], doreturn=False)
+        colors = classify.edge_colors(atlas, rects)
+        ids, self.edge_palette = classify.cluster(colors, self.edge_palette, self.edge_color_tolerance, self.edge_color_count)
+        for i, (n, e, s, w) in zip(tile_indices, ids.tolist()):
+            self.tiles[i].sides = Sides(n=n, e=e, s=s, w=w)
+
+    def build_tile_atlas(self) -> None:
+        """
+        Packs every tile into a single surface converted to the display's pixel
+        format (when a display is up) and points each Tile at its subsurface, so
+        blits don't have to convert pixels and we only keep one surface around.
+        """
+        cols = max(1, math.ceil(math.sqrt(len(self.tiles))))
+        rows = max(1, (len(self.tiles) + cols - 1) // cols)
+        atlas = pygame.Surface((cols * self.tile_w, rows * self.tile_h), pygame.SRCALPHA)
+
+        has_alpha = False
+        for i, t in enumerate(self.tiles):
+            t.atlas_rect = pygame.Rect((i % cols) * self.tile_w, (i // cols) * self.tile_h, self.tile_w, self.tile_h)
+            atlas.blit(t.surface, t.atlas_rect)
+            has_alpha = has_alpha or t.surface.get_flags() & pygame.SRCALPHA != 0
+
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            atlas = atlas.convert_alpha() if has_alpha else atlas.convert()
+
+        self.tile_atlas = atlas
+        for t in self.tiles:
+            t.surface = atlas.subsurface(t.atlas_rect)
+
+    def build_tile_lookup(self) -> None:
+        """
+        Indexes the tiles by the edges a neighbour can constrain, so get_rand_tile
+        only has to do a single dict lookup per cell. Keys are (west, north) where
+        None means that side is unconstrained. tile_lookup_weights has the
+        candidates' cumulative weights under the same keys, for weighted sets.
+        """
+        self.tile_lookup = {}
+        for i, t in enumerate(self.tiles):
+            for key in [(t.sides.w, t.sides.n), (t.sides.w, None), (None, t.sides.n), (None, None)]:
+                self.tile_lookup.setdefault(key, []).append(i)
+        self.tile_lookup_weights = {}
+        if any(t.weight != 1.0 for t in self.tiles):
+            for key, candidates in self.tile_lookup.items():
+                cum_weights = list(accumulate(self.tiles[i].weight for i in candidates))
+                # nothing to go by if they all weigh 0, pick evenly
+                if cum_weights[-1] > 0:
+                    self.tile_lookup_weights[key] = cum_weights
+        self.tile_signatures = wang.signature_table(self.tiles, max(1, len(self.edge_palette)))
+
+    def new_grid(self, cell_count: int) -> array:
+        typecode = 'B' if len(self.tiles) < 0xFF else 'H'
+        self.empty_tile = 0xFF if typecode == 'B' else 0xFFFF
+        return array(typecode, [self.empty_tile]) * cell_count
+
+    def grid_view(self) -> np.ndarray:
+        """
+        Returns a (tile_count_h, tile_count_w) NumPy view sharing memory with grid_tiles.
+        """
+        return np.frombuffer(self.grid_tiles, dtype=np.dtype(self.grid_tiles.typecode)).reshape(self.tile_count_h, self.tile_count_w)
+
+    def snapshot_grid(self) -> array:
+        return array(self.grid_tiles.typecode, self.grid_tiles)
+
+    def restore_grid(self, snapshot: array) -> None:
+        self.grid_tiles[:] = snapshot
+        self.grid_archive.clear()
+        self.invalidate_grid()
+
+    def resize(self, screen_width: int, screen_height: int) -> None:
+        """
+        Fits the grid to a new screen size. Cells still on screen keep their tiles,
+        cells that fall off go to grid_archive, and only the newly exposed cells
+        are filled in: from the archive where possible, otherwise generated to
+        match the tiles around them.
+        """
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        new_w = max(1, screen_width // self.tile_w)
+        new_h = max(1, screen_height // self.tile_h)
+        old_w = self.tile_count_w
+        old_h = self.tile_count_h
+        if (new_w, new_h) == (old_w, old_h) or self.grid_tiles is None:
+            self.tile_count_w = new_w
+            self.tile_count_h = new_h
+            return
+
+        old = self.grid_view()
+        keep_w = min(old_w, new_w)
+        keep_h = min(old_h, new_h)
+
+        dropped = old_w * old_h - keep_w * keep_h
+        if len(self.grid_archive) + dropped > self.grid_archive_limit:
+            # a partial archive could hold tiles that don't fit what gets generated next to them
+            self.grid_archive.clear()
+        else:
+            for y, row in enumerate(old[:, keep_w:].tolist()):
+                for x, ti in enumerate(row, keep_w):
+                    self.grid_archive[(x, y)] = ti
+            for y, row in enumerate(old[keep_h:, :keep_w].tolist(), keep_h):
+                for x, ti in enumerate(row):
+                    self.grid_archive[(x, y)] = ti
+
+        # the highlighted neighbours are cell indices for the old width
+        self.check_tile_west = self.remap_cell(self.check_tile_west, old_w, new_w, new_h)
+        self.check_tile_north = self.remap_cell(self.check_tile_north, old_w, new_w, new_h)
+
+        kept = old[:keep_h, :keep_w].copy()
+        self.tile_count_w = new_w
+        self.tile_count_h = new_h
+        if self.pregenerator is not None:
+            # everything queued was made for the old size; refill once the new size is set
+            self.pregenerator.clear()
+        self.grid_tiles = self.new_grid(new_w * new_h)
+        self.grid_view()[:keep_h, :keep_w] = kept
+
+        # the new cells, row by row, so west and north neighbours are always placed first
+        exposed = [y * new_w + x for y in range(keep_h) for x in range(keep_w, new_w)]
+        exposed += range(keep_h * new_w, new_w * new_h)
+        missing = []
+        for ti in exposed:
+            tile = self.grid_archive.pop((ti % new_w, ti // new_w), None)
+            if tile is None:
+                missing.append(ti)
+            else:
+                self.grid_tiles[ti] = tile
+
+        try:
+            for ti in missing:
+                self.grid_tiles[ti] = self.get_rand_tile(ti)
+        except ValueError:
+            # incomplete tile set: let the solver fill the gaps around the pinned tiles
+            solver = Solver(self.tiles, self.rng)
+            initial = [solver.all_tiles if t == self.empty_tile else 1 << t for t in self.grid_tiles]
+            for ti in missing:
+                initial[ti] = solver.all_tiles
+            try:
+                self.grid_tiles[:] = array(self.grid_tiles.typecode, solver.solve(new_w, new_h, initial))
+                self.record_solver(solver.stats)
+            except ValueError:
+                self.create_wang_tiles()
+                return
+
+        self.invalidate_grid()
+
+    @staticmethod
+    def remap_cell(cell_index: int|None, old_w: int, new_w: int, new_h: int) -> int|None:
+        """
+        Returns the index of the same (col, row) in a new_w x new_h grid, or None
+        if it's outside of it.
+        """
+        if cell_index is None:
+            return None
+        x, y = cell_index % old_w, cell_index // old_w
+        return y * new_w + x if x < new_w and y < new_h else None
+
+    def cell_pos(self, cell_index: int) -> Tuple[int, int]:
+        return (cell_index % self.tile_count_w) * self.tile_w, (cell_index // self.tile_count_w) * self.tile_h
+
+    def cell_rect(self, cell_index: int) -> pygame.Rect:
+        """
+        Returns where cell_index is on screen, with the viewport's zoom and the camera applied.
+        """
+        return self.viewport.cell_rect(cell_index % self.tile_count_w, cell_index // self.tile_count_w, self.camera)
 
     def create_wang_tiles(self) -> None:
-        for ti in range(len(self.grid_tiles)):
-            t = self.get_rand_tile(ti)
-            self.grid_tiles[ti] = t
+        self.grid_archive.clear()
+        if self.generator_mode == 'solver':
+            self.solve_wang_tiles()
+        else:
+            try:
+                if self.generator_mode == 'vectorized':
+                    indices = wang.generate_edge_grid(self.tile_signatures, self.tile_count_w, self.tile_count_h, self.np_rng)
+                    self.grid_view()[:] = indices
+                elif self.generator_mode == 'parallel':
+                    indices = parallel.generate(self.tile_signatures, self.tile_count_w, self.tile_count_h,
+                                                self.rng.getrandbits(63), self.parallel_workers)
+                    self.grid_view()[:] = indices
+                else:
+                    for ti in range(len(self.grid_tiles)):
+                        t = self.get_rand_tile(ti)
+                        self.grid_tiles[ti] = t
+            except ValueError:
+                # incomplete tile set: the greedy generators can't fill every cell
+                self.solve_wang_tiles()
+
+        self.invalidate_grid()
+        self.count_stat('regenerations')
+
+    def generate_grid(self, w: int, h: int, rng: Random, np_rng: np.random.Generator) -> PreparedGrid:
+        """
+        Returns a new w x h grid for the current generator_mode drawn from the given
+        generators, not rendered yet. Leaves grid_tiles (and solver_stats) alone,
+        so it's safe to run off the main thread.
+        """
+        grid = array(self.grid_tiles.typecode, [self.empty_tile]) * (w * h)
+        prepared = PreparedGrid(w, h, grid)
+        if not grid:
+            return prepared
+        view = np.frombuffer(grid, dtype=np.dtype(grid.typecode)).reshape(h, w)
+        if self.generator_mode != 'solver':
+            try:
+                if self.generator_mode == 'vectorized':
+                    view[:] = wang.generate_edge_grid(self.tile_signatures, w, h, np_rng)
+                elif self.generator_mode == 'parallel':
+                    view[:] = parallel.generate(self.tile_signatures, w, h, rng.getrandbits(63), self.parallel_workers)
+                else:
+                    for ti in range(w * h):
+                        grid[ti] = self.pick_tile(self.neighbour_edges(grid, w, ti), rng)
+                return prepared
+            except ValueError:
+                pass
+        solver = Solver(self.tiles, rng)
+        grid[:] = array(grid.typecode, solver.solve(w, h))
+        prepared.solver_stats = solver.stats
+        return prepared
+
+    def prepare_grid(self, seed: int) -> PreparedGrid:
+        """
+        Generates a grid from `seed`, and renders it when pregenerate_render is set,
+        ready to be swapped in with swap_grid. Runs on the pregenerator's thread.
+        """
+        w = self.tile_count_w
+        h = self.tile_count_h
+        prepared = self.generate_grid(w, h, Random(seed), np.random.default_rng(seed))
+        if self.pregenerate_render:
+            surfaces = [t.surface for t in self.tiles]
+            positions = Vec2Array.grid(w, h, self.tile_w, self.tile_h).to_blit_dests()
+            prepared.blits = [(surfaces[ti], pos) for ti, pos in zip(prepared.grid_tiles, positions)]
+            prepared.surface = pygame.Surface((w * self.tile_w, h * self.tile_h), pygame.SRCALPHA)
+            prepared.surface.blits(prepared.blits, doreturn=False)
+        return prepared
+
+    def background_done(self) -> None:
+        # called on the pregenerator's thread; event.post is safe from any thread
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(BACKGROUND_DONE))
+
+    def is_idle(self) -> bool:
+        """
+        Whether the next frame would look just like the last one unless new input
+        arrives, so the main loop can wait for events instead of drawing it.
+        """
+        return not (self.screen_dirty or self.changed_cells or self.keyboard.arrow_held.any())
+
+    def next_grid(self) -> None:
+        """
+        Replaces the grid with a new one: the next pregenerated grid if there is a
+        pregenerator, otherwise one generated right now.
+        """
+        if self.pregenerator is None:
+            self.create_wang_tiles()
+            return
+        size = (self.tile_count_w, self.tile_count_h)
+        prepared = self.pregenerator.take()
+        if (prepared.width, prepared.height) != size:
+            # already running when the screen was resized (resize drops the rest),
+            # the one queued after it is the new size
+            prepared = self.pregenerator.take()
+        if (prepared.width, prepared.height) != size:
+            self.pregenerator.clear()
+            self.create_wang_tiles()
+            return
+        self.swap_grid(prepared)
+
+    def swap_grid(self, prepared: PreparedGrid) -> None:
+        self.grid_tiles = prepared.grid_tiles
+        self.grid_archive.clear()
+        self.invalidate_grid()
+        if prepared.surface is not None:
+            self.grid_surface = prepared.surface
+            self.grid_blits = prepared.blits
+            self.grid_positions = [pos for _, pos in prepared.blits]
+            self.grid_dirty = False
+        if prepared.solver_stats is not None:
+            self.record_solver(prepared.solver_stats)
+        self.count_stat('regenerations')
+
+    def solve_wang_tiles(self) -> None:
+        solver = Solver(self.tiles, self.rng)
+        self.grid_tiles[:] = array(self.grid_tiles.typecode, solver.solve(self.tile_count_w, self.tile_count_h))
+        self.record_solver(solver.stats)
+
+    def record_solver(self, solver_stats: SolverStats) -> None:
+        # main thread only; background grids hand theirs over in swap_grid
+        self.solver_stats = solver_stats
+        if self.stats is not None:
+            self.stats.solver_run(solver_stats.cells, solver_stats.seconds)
+
+    def export_png(self, path: str) -> None:
+        """
+        Writes the grid to a PNG a row of tiles at a time, without rendering it whole.
+        """
+        export.write_png(path, self.grid_view(), self.tiles, self.tile_w, self.tile_h)
+
+    def count_stat(self, counter: str, n: int = 1) -> None:
+        if self.stats is not None:
+            self.stats.count(counter, n)
+
+    def set_grid_tile(self, cell_index: int, tile_index: int) -> None:
+        self.grid_tiles[cell_index] = tile_index
+        self.viewport.invalidate()
+        if not self.grid_dirty:
+            if tile_index == self.empty_tile:
+                self.grid_blits[cell_index] = None
+            else:
+                self.grid_blits[cell_index] = (self.tiles[tile_index].surface, self.grid_positions[cell_index])
+        self.dirty_cells.add(cell_index)
+        self.changed_cells.add(cell_index)
+
+    def invalidate_grid(self) -> None:
+        self.grid_dirty = True
+        self.dirty_cells.clear()
+        self.changed_cells.clear()
+        self.screen_dirty = True
+        self.viewport.invalidate()
+
+    def build_grid_blits(self) -> None:
+        surfaces = [t.surface for t in self.tiles]
+        if self.empty_tile in self.grid_tiles:
+            self.grid_blits = [None if ti == self.empty_tile else (surfaces[ti], pos)
+                               for ti, pos in zip(self.grid_tiles, self.grid_positions)]
+        else:
+            self.grid_blits = [(surfaces[ti], pos) for ti, pos in zip(self.grid_tiles, self.grid_positions)]
+
+    def render_grid(self) -> pygame.Surface:
+        """
+        Brings the cached grid surface up to date with grid_tiles and returns it.
+        Empty cells are left transparent so the background shows through.
+        """
+        size = (self.tile_count_w * self.tile_w, self.tile_count_h * self.tile_h)
+        if self.grid_surface is None or self.grid_surface.get_size() != size:
+            self.grid_surface = pygame.Surface(size, pygame.SRCALPHA)
+            self.grid_positions = Vec2Array.grid(self.tile_count_w, self.tile_count_h, self.tile_w, self.tile_h).to_blit_dests()
+            self.grid_dirty = True
+
+        if self.grid_dirty:
+            self.build_grid_blits()
+            self.grid_surface.fill((0, 0, 0, 0))
+            if None in self.grid_blits:
+                blits = [b for b in self.grid_blits if b is not None]
+            else:
+                blits = self.grid_blits
+            self.grid_surface.blits(blits, doreturn=False)
+            self.count_stat('blits', len(blits))
+        elif self.dirty_cells:
+            blits = []
+            for index in self.dirty_cells:
+                x, y = self.grid_positions[index]
+                self.grid_surface.fill((0, 0, 0, 0), (x, y, self.tile_w, self.tile_h))
+                b = self.grid_blits[index]
+                if b is not None:
+                    blits.append(b)
+            self.grid_surface.blits(blits, doreturn=False)
+            self.count_stat('blits', len(blits))
+
+        self.grid_dirty = False
+        self.dirty_cells.clear()
+
+        return self.grid_surface
 
     def set_background_color(self, color: Color):
         self.background_color = color
+        self.screen_dirty = True
 
     def register_background_image(self, path):        
         self.background_image = pygame.image.load(path)
         self.background_image = pygame.transform.scale(self.background_image, (self.screen.get_width(), self.screen.get_height()))
+        self.screen_dirty = True
 
     def register_font(self, path: str, size: int, font_use_type: FontUseType) -> None:
         if font_use_type == FontUseType.DEFAULT:
@@ -146,79 +734,120 @@ class Game:
         else:
             raise ValueError(f'Unknown font_use_type: {font_use_type}')
 
-    def draw(self):
+    def draw(self) -> List[pygame.Rect]|None:
+        """
+        Draws the frame. Returns the screen rects that changed, for
+        pygame.display.update, or None if the whole screen was redrawn.
+        """
+        view = (self.screen, self.screen.get_size(), self.camera.x, self.camera.y, self.viewport.level)
+        full = self.screen_dirty or view != self.last_view
+        if self.changed_cells and self.viewport.uses_overview() and not self.world_mode:
+            # scaling the overview blends each cell into its neighbours
+            full = True
+
+        highlights = []
+        if not self.world_mode:
+            if self.check_tile_north is not None:
+                highlights.append((Colors.PURPLE, self.cell_rect(self.check_tile_north)))
+            if self.check_tile_west is not None:
+                highlights.append((Colors.GREEN, self.cell_rect(self.check_tile_west)))
+        stats_overlay = None
+        if self.show_stats and self.stats is not None:
+            stats_overlay = self.stats.render_overlay(self.font_store.default.font)
+        overlay_rects = [r for _, r in highlights]
+        if stats_overlay is not None:
+            overlay_rects.append(pygame.Rect(OVERLAY_POS, stats_overlay.get_size()))
+
+        if full:
+            self.draw_scene()
+            rects = None
+        else:
+            # put back what's under the overlays, where they were and where they go,
+            # so translucent ones don't pile up, along with the cells that changed
+            screen_rect = self.screen.get_rect()
+            rects = [self.cell_rect(i) for i in self.changed_cells] + self.overlay_rects + overlay_rects
+            rects = [r for r in (r.clip(screen_rect) for r in rects) if r.width and r.height]
+            for r in rects:
+                self.screen.set_clip(r)
+                self.draw_scene()
+            self.screen.set_clip(None)
+
+        for color, r in highlights:
+            Shape.rect(self.screen, color, r, 5)
+        if stats_overlay is not None:
+            self.screen.blit(stats_overlay, OVERLAY_POS)
+
+        self.changed_cells.clear()
+        self.overlay_rects = overlay_rects
+        self.last_view = view
+        self.screen_dirty = False
+        return rects
+
+    def draw_scene(self):
+        """
+        Draws the background and the map, limited to the screen's clip rect.
+        """
         # clear the screen
         if self.background_image is None:
-            self.screen.fill(self.background_color.get())
+            self.screen.fill(self.background_color.mapped(self.screen))
         else:
             self.screen.blit(self.background_image, (0, 0))
 
-        for y in range(self.tile_count_h):
-            for x in range(self.tile_count_w):
-                index = y * self.tile_count_w + x
-                tile = self.grid_tiles[index]
-                if tile is not None:
-                    tile.x = x * self.tile_w
-                    tile.y = y * self.tile_h
-                    self.screen.blit(tile.surface, (tile.x, tile.y))
-
-        if self.check_tile_north is not None:
-            Shape.rect(self.screen, Colors.PURPLE, pygame.Rect(self.check_tile_north.x, self.check_tile_north.y, self.tile_w, self.tile_h),5)
+        if self.world_mode:
+            self.count_stat('blits', self.world.draw(self.screen, int(self.camera.x), int(self.camera.y)))
+        else:
+            self.draw_grid()
 
-        if self.check_tile_west is not None:
-            Shape.rect(self.screen, Colors.GREEN, pygame.Rect(self.check_tile_west.x, self.check_tile_west.y, self.tile_w, self.tile_h),5)
+    def draw_grid(self):
+        if self.viewport.level == 0:
+            # native size: the cached grid surface, clipped to the screen by blit
+            self.screen.blit(self.render_grid(), (-int(self.camera.x), -int(self.camera.y)))
+            self.count_stat('blits')
+        else:
+            self.count_stat('blits', self.viewport.draw(self.screen, self.grid_view(), self.tiles, self.camera))
 
         # x = 64
         # y = 64
         # for t in self.candidate_tiles:
-        #     self.screen.blit(t.surface, (x, y))
-        #     text = self.font_store.default.font.render(t.filepath, True, Colors.WHITE.get())
+        #     self.screen.blit(self.tiles[t].surface, (x, y))
+        #     text = self.font_store.default.font.render(self.tiles[t].filepath, True, Colors.WHITE.get())
         #     tw, th = text.get_size()
         #     self.screen.blit(text, (x + self.tile_w, y + th/2))
         #     y += self.tile_h
 
 
-    def get_rand_tile(self, tile_index: int) -> Tile:
-        if tile_index == 0:
-            tile = choice(self.tiles)
-            return tile
-
-        s = Sides()
-
-        check_west = False
-        self.check_tile_west = None
-        if tile_index % self.tile_count_w > 0:
-            check_west = True
-            self.check_tile_west = self.grid_tiles[tile_index - 1]
-            west_tile_sides = self.check_tile_west.sides
-            s.w = west_tile_sides.e
-
-        check_north = False
-        self.check_tile_north = None
-        if tile_index >= self.tile_count_w:
-            check_north = True
-            self.check_tile_north = self.grid_tiles[tile_index - self.tile_count_w]
-            north_tile_sides = self.check_tile_north.sides
-            s.n = north_tile_sides.s
-
-        self.candidate_tiles = []
-        for t in self.tiles:
-            if check_west and check_north:
-                if t.sides.w == s.w and t.sides.n == s.n:
-                    self.candidate_tiles.append(t)
-            elif check_west and not check_north:
-                if t.sides.w == s.w:
-                    self.candidate_tiles.append(t)
-            elif not check_west and check_north:
-                if t.sides.n == s.n:
-                    self.candidate_tiles.append(t)
-
-        if len(self.candidate_tiles) == 0:
+    def get_rand_tile(self, tile_index: int) -> int:
+        """
+        Returns the index (into tiles) of a random tile that fits the already placed
+        west and north neighbours of cell tile_index.
+        """
+        w = self.tile_count_w
+        self.check_tile_west = tile_index - 1 if tile_index % w > 0 else None
+        self.check_tile_north = tile_index - w if tile_index >= w else None
+        key = self.neighbour_edges(self.grid_tiles, w, tile_index)
+        self.candidate_tiles = self.tile_lookup.get(key)
+        return self.pick_tile(key, self.rng)
+
+    def neighbour_edges(self, grid: array, width: int, cell_index: int) -> Tuple[int|None, int|None]:
+        """
+        Returns the tile_lookup key for cell_index in the row-major `grid`, which
+        is `width` cells wide: the edges of its west and north neighbours.
+        """
+        west = self.tiles[grid[cell_index - 1]].sides.e if cell_index % width > 0 else None
+        north = self.tiles[grid[cell_index - width]].sides.s if cell_index >= width else None
+        return west, north
+
+    def pick_tile(self, key: Tuple[int|None, int|None], rng: Random) -> int:
+        """
+        Returns a random tile, by weight, out of the ones tile_lookup has for `key`.
+        """
+        candidates = self.tile_lookup.get(key)
+        if not candidates:
             raise ValueError(f'Could not find valid tile!')
-
-        tile = choice(self.candidate_tiles)
-
-        return tile
+        cum_weights = self.tile_lookup_weights.get(key)
+        if cum_weights is None:
+            return rng.choice(candidates)
+        return rng.choices(candidates, cum_weights=cum_weights)[0]
 
     def update(self):
         if self.mouse.left_released:
@@ -238,8 +867,14 @@ class Game:
                     self.active_item.deactivate()
             elif self.hot_item is not None:
                 self.active_item = self.hot_item.handle_click(self.mouse.pos)                
+            elif self.dragging:
+                # releasing after a drag just ends the pan
+                self.dragging = False
+            elif self.world_mode:
+                self.world.reseed(self.rng.getrandbits(63))
+                self.screen_dirty = True
             else:
-                self.create_wang_tiles()
+                self.next_grid()
                 # if self.tile_index <= ((self.tile_count_h * self.tile_count_w)-1):
                 #     self.grid_tiles[self.tile_index] = self.get_rand_tile(self.tile_index)
                 #     self.tile_index += 1
@@ -256,15 +891,58 @@ class Game:
         elif self.mouse.left_was_down and self.mouse.mouse_moved:
             if self.active_item is not None and self.active_item.dragging:
                 self.active_item.handle_drag(self.mouse.offset_x, self.mouse.offset_y)
-        
-        self.keyboard = Keyboard.next_frame(self.keyboard)
-        self.mouse = Mouse.next_frame(self.mouse)
+            else:
+                self.dragging = True
+                dx, dy = self.viewport.to_map(self.mouse.offset_x, self.mouse.offset_y)
+                self.camera.x -= dx
+                self.camera.y -= dy
+
+        if self.mouse.scrolled_amt_y and not self.world_mode:
+            self.viewport.zoom_by(self.mouse.scrolled_amt_y, self.camera, (self.mouse.pos.x, self.mouse.pos.y))
 
-    def load_setup(self, setup_file_path: str) -> None:
-        # with open(setup_file_path) as f:
-        #     data = loads(f.read())
+        self.scroll_camera()
         
+        self.keyboard.reset()
+        self.mouse.reset()
+
+    def scroll_camera(self) -> None:
+        arrow = self.keyboard.arrow_held
+        # scroll_speed is in screen pixels, whatever the zoom
+        speed_x, speed_y = self.viewport.to_map(self.scroll_speed, self.scroll_speed)
+        if arrow.left:
+            self.camera.x -= speed_x
+        if arrow.right:
+            self.camera.x += speed_x
+        if arrow.up:
+            self.camera.y -= speed_y
+        if arrow.down:
+            self.camera.y += speed_y
+
+    def load_setup(self, setup_file_path: str, save_manifest: bool = True) -> None:
+        self.setup_file_path = setup_file_path
+        self.manifest = {}
+        if os.path.exists(setup_file_path):
+            with open(setup_file_path) as f:
+                try:
+                    data = loads(f.read())
+                except JSONDecodeError:
+                    # an empty or hand-mangled setup file just means nothing is cached yet
+                    data = {}
+            if isinstance(data, dict) and data.get('tile_sets_dir') == self.tile_sets_dir:
+                self.manifest = data
+
         self.__post_setup__()
 
+        if save_manifest and self.manifest_changed:
+            self.save_setup(setup_file_path)
+
+    def save_setup(self, setup_file_path: str) -> None:
+        data = {'tile_sets_dir': self.tile_sets_dir, **self.manifest}
+        tmp_path = f'{setup_file_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(dumps(data, indent=4))
+        os.replace(tmp_path, setup_file_path)
+        self.manifest_changed = False
+
     def check_radio_groups(self):
         ...
\ No newline at end of file
@@ -47,15 +47,61 @@ from pygame.locals import (
     K_KP_9
 )
 
-@dataclass
+# key -> Keyboard flag set while that key went down this frame
+KEY_FLAGS = {
+    K_BACKSPACE: 'backspace',
+    K_LALT: 'alt',
+    K_RALT: 'alt',
+    K_LCTRL: 'ctrl',
+    K_RCTRL: 'ctrl',
+    K_LSHIFT: 'shift',
+    K_RSHIFT: 'shift',
+    K_KP_ENTER: 'enter',
+    K_RETURN: 'enter',
+    K_SPACE: 'space',
+    K_ESCAPE: 'escape',
+    K_TAB: 'tab',
+    K_DELETE: 'delete',
+    K_HOME: 'home',
+    K_END: 'end',
+    K_PAGEDOWN: 'pagedown',
+    K_PAGEUP: 'pageup',
+}
+
+# key -> Arrow field
+ARROW_KEYS = {
+    K_UP: 'up',
+    K_RIGHT: 'right',
+    K_DOWN: 'down',
+    K_LEFT: 'left',
+}
+
+DIGIT_KEYS = frozenset([K_0, K_KP_0, K_1, K_KP_1, K_2, K_KP_2,
+                        K_3, K_KP_3, K_4, K_KP_4, K_5, K_KP_5,
+                        K_6, K_KP_6, K_7, K_KP_7, K_8, K_KP_8, K_9, K_KP_9])
+
+@dataclass(slots=True)
 class Arrow:
     up: bool = False
     right: bool = False
     down: bool = False
     left: bool = False
 
-@dataclass
+    def reset(self) -> None:
+        self.up = False
+        self.right = False
+        self.down = False
+        self.left = False
+
+    def any(self) -> bool:
+        return self.up or self.right or self.down or self.left
+
+@dataclass(slots=True)
 class Keyboard:
+    """
+    Keyboard state for the current frame. One instance lives for the whole game
+    and is reset in place each frame, see reset().
+    """
     key: Any = None
     alt: bool = False
     backspace: bool = False
@@ -70,59 +116,57 @@ class Keyboard:
     shift: bool = False
     space: bool = False
     tab: bool = False
-    arrow: Arrow = field(init=False)
+    arrow: Arrow = field(default_factory=Arrow)
+    # unlike arrow, which is only set on the frame the key went down, arrow_held
+    # stays set until the key is released
+    arrow_held: Arrow = field(default_factory=Arrow)
     
     shift_was_down: bool = False
 
-    def __post_init__(self):
-        self.arrow = Arrow()
-
     @staticmethod
     def next_frame(kb: Keyboard = None) -> Keyboard:
-        k = Keyboard()
-        if kb is not None:
-            k.shift_was_down = kb.shift_was_down
-        return k
+        if kb is None:
+            return Keyboard()
+        kb.reset()
+        return kb
+
+    def reset(self) -> None:
+        """
+        Clears everything that only lasts a frame; shift_was_down and arrow_held
+        carry over.
+        """
+        self.key = None
+        self.alt = False
+        self.backspace = False
+        self.ctrl = False
+        self.delete = False
+        self.end = False
+        self.enter = False
+        self.escape = False
+        self.home = False
+        self.pagedown = False
+        self.pageup = False
+        self.shift = False
+        self.space = False
+        self.tab = False
+        self.arrow.reset()
 
     def update(self, key: Any, key_unicode: str) -> None:
-        if key == K_BACKSPACE:
-            self.backspace = True
-        elif key in [K_LALT, K_RALT]:
-            self.alt = True
-        elif key in [K_LCTRL, K_RCTRL]:
-            self.ctrl = True
-        elif key in [K_LSHIFT, K_RSHIFT]:
-            self.shift = True
-        elif key in [K_KP_ENTER, K_RETURN]:
-            self.enter = True
-        elif key == K_SPACE:
-            self.space = True
-        elif key == K_ESCAPE:
-            self.escape = True
-        elif key == K_TAB:
-            self.tab = True
-        elif key == K_UP:
-            self.arrow.up = True
-        elif key == K_RIGHT:
-            self.arrow.right = True
-        elif key == K_DOWN:
-            self.arrow.down = True
-        elif key == K_LEFT:
-            self.arrow.left = True
-        elif key == K_DELETE:
-            self.delete = True
-        elif key == K_HOME:
-            self.home = True
-        elif key == K_END:
-            self.end = True
-        elif key == K_PAGEDOWN:
-            self.pagedown = True
-        elif key == K_PAGEUP:
-            self.pageup = True
-        elif key in [K_0, K_KP_0, K_1, K_KP_1, K_2, K_KP_2,
-                     K_3, K_KP_3, K_4, K_KP_4, K_5, K_KP_5,
-                     K_6, K_KP_6, K_7, K_KP_7, K_8, K_KP_8, K_9, K_KP_9]:
+        flag = KEY_FLAGS.get(key)
+        if flag is not None:
+            setattr(self, flag, True)
+            return
+
+        arrow = ARROW_KEYS.get(key)
+        if arrow is not None:
+            setattr(self.arrow, arrow, True)
+            setattr(self.arrow_held, arrow, True)
+            return
+
+        if key in DIGIT_KEYS or (key > 64 and key < 91) or (key > 96 and key < 123):
             self.key = key_unicode
-        else:
-            if (key > 64 and key < 91) or (key > 96 and key < 123):
-                self.key = key_unicode
\ No newline at end of file
+
+    def release(self, key: Any) -> None:
+        arrow = ARROW_KEYS.get(key)
+        if arrow is not None:
+            setattr(self.arrow_held, arrow, False)
@@ -1,11 +1,16 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Tuple
 from _math import Vec2
 
-@dataclass
+@dataclass(slots=True)
 class Mouse:
-    pos: Vec2 = Vec2(0, 0)
+    """
+    Mouse state for the current frame. One instance lives for the whole game and
+    is reset in place each frame, see reset(); pos and last_pos are updated in
+    place too, so copy them if you need to keep them around.
+    """
+    pos: Vec2 = field(default_factory=Vec2)
     left_down: bool = False
     left_released: bool = False
     left_was_down: bool = False
@@ -17,23 +22,44 @@ class Mouse:
     scrolled_down: bool = False
     scrolled_amt_x: int = 0
     scrolled_amt_y: int = 0
-    last_pos: Vec2 = Vec2(0, 0)
+    last_pos: Vec2 = field(default_factory=Vec2)
     mouse_moved: bool = False
     offset_x: int = 0
     offset_y: int = 0
 
     @staticmethod
     def next_frame(pm: Mouse = None) -> Mouse:
-        m = Mouse()
-        if pm:
-            m.last_pos = pm.pos
-            m.left_was_down = pm.left_was_down
-        return m
+        if pm is None:
+            return Mouse()
+        pm.reset()
+        return pm
+
+    def reset(self) -> None:
+        """
+        Clears everything that only lasts a frame; left_was_down carries over and
+        the current position becomes last_pos.
+        """
+        self.last_pos.x = self.pos.x
+        self.last_pos.y = self.pos.y
+        self.left_down = False
+        self.left_released = False
+        self.right_down = False
+        self.right_released = False
+        self.middle_down = False
+        self.middle_released = False
+        self.scrolled_up = False
+        self.scrolled_down = False
+        self.scrolled_amt_x = 0
+        self.scrolled_amt_y = 0
+        self.mouse_moved = False
+        self.offset_x = 0
+        self.offset_y = 0
 
     def set_offset(self, offset: Tuple[int]) -> None:
+        # a frame can see several motion events, so add them all up
         self.mouse_moved = True
-        self.offset_x = offset[0]
-        self.offset_y = offset[1]
+        self.offset_x += offset[0]
+        self.offset_y += offset[1]
 
     def get_offset_from_last_frame(self) -> Vec2:
         p = self.pos.copy()
@@ -41,7 +67,8 @@ class Mouse:
         return p
 
     def set_pos(self, pos: Tuple[int]) -> None:
-        self.pos = Vec2(pos[0], pos[1])
+        self.pos.x = pos[0]
+        self.pos.y = pos[1]
 
     def set_pressed(self, button: int) -> None:
         if button == 1:
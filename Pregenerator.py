@@ -0,0 +1,70 @@
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from random import Random
+from typing import Any, Callable
+
+@dataclass
+class Pregenerator:
+    """
+    Keeps the next `depth` results of `generate` in the works on a background
+    thread, so take() usually returns something that's already done, and starts
+    on the one after it right away.
+
+    Each job gets a seed drawn from `rng` when it's queued, on the caller's
+    thread, so the results come out in the same order whatever the timing.
+    on_done, if given, is called from the background thread as each job finishes.
+    """
+    generate: Callable[[int], Any]
+    rng: Random
+    depth: int = 1
+    on_done: Callable[[], None] = None
+
+    pending: deque = field(default_factory=deque)
+    executor: ThreadPoolExecutor = None
+    taken: int = 0
+    waited: int = 0
+
+    def __post_init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pregenerate')
+        self.fill()
+
+    def fill(self) -> None:
+        while len(self.pending) < self.depth:
+            future = self.executor.submit(self.generate, self.rng.getrandbits(63))
+            future.add_done_callback(self.done)
+            self.pending.append(future)
+
+    def done(self, future: Future) -> None:
+        if self.on_done is not None and not future.cancelled():
+            self.on_done()
+
+    def take(self) -> Any:
+        """
+        Returns the oldest result, waiting for it if it isn't done yet.
+        """
+        future: Future = self.pending.popleft()
+        self.taken += 1
+        if not future.done():
+            self.waited += 1
+        self.fill()
+        return future.result()
+
+    def ready(self) -> bool:
+        return bool(self.pending) and self.pending[0].done()
+
+    def clear(self) -> None:
+        """
+        Throws away everything queued (e.g. because the grid size changed) and starts over.
+        """
+        for future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        self.fill()
+
+    def close(self) -> None:
+        for future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,12 +1,54 @@
 # stolen shamelessly from https://stackoverflow.com/questions/6339057/draw-a-transparent-rectangles-and-polygons-in-pygame
-from typing import Tuple, List
-from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Any, Callable, ClassVar, Dict, Tuple, List
+from dataclasses import dataclass, field
 import pygame
 from colors import Color
 from _math import Vec2
 
+@dataclass
+class ShapeCache:
+    """
+    Bounded LRU cache of pre-rendered shape surfaces, keyed by everything that
+    affects how the shape looks (kind, size, color, width, radius, rotation), so
+    drawing the same shape again is a single blit.
+    """
+    max_size: int = 256
+    surfaces: OrderedDict = field(default_factory=OrderedDict)
+    hits: int = 0
+    misses: int = 0
+
+    def get(self, key: Tuple, build: Callable[[], pygame.Surface]) -> pygame.Surface:
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surf
+        self.misses += 1
+        surf = build()
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surf
+
+    def clear(self) -> None:
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'size': len(self.surfaces),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
 @dataclass
 class Shape:
+    cache: ClassVar[ShapeCache] = ShapeCache()
 
     @staticmethod
     def line(surface: pygame.Surface, color: Color, p1: Vec2, p2: Vec2, width: int = 1, rot_angle: int = 0) -> None:
@@ -17,7 +59,6 @@ class Shape:
         if diff_x != 0 and diff_y != 0:
             diag = True
             rect = pygame.Rect(p1.x, p1.y, diff_x, diff_y)
-            shape_surf = pygame.Surface((diff_x, diff_y), pygame.SRCALPHA)
         else:
             if diff_y > 0:
                 horz = False
@@ -28,43 +69,73 @@ class Shape:
                 rect_height = width
                 rect_width = diff_x
             rect = pygame.Rect(p1.x, p1.y, rect_width, rect_height)
-            shape_surf = pygame.Surface((rect_width, rect_height), pygame.SRCALPHA)
-        if rot_angle > 0:
-            shape_surf = pygame.transform.rotate(shape_surf, rot_angle)
-        if diag:
-            if p1.y < p2.y:
-                pygame.draw.line(shape_surf, color.get(), (0, 0), (diff_x, diff_y), width)
-            else:
-                pygame.draw.line(shape_surf, color.get(), (0, diff_y), (diff_x, 0), width)
-        else:
-            if horz:
-                pygame.draw.line(shape_surf, color.get(), (0, 0), (rect.right, 0), width)
+        rgba = color.get()
+        # anything past the surface's edge is clipped anyway
+        end = min(rect.right, rect.width) if horz else min(rect.bottom, rect.height)
+        down = p1.y < p2.y
+
+        def build() -> pygame.Surface:
+            shape_surf = pygame.Surface(rect.size, pygame.SRCALPHA)
+            if rot_angle > 0:
+                shape_surf = pygame.transform.rotate(shape_surf, rot_angle)
+            if diag:
+                if down:
+                    pygame.draw.line(shape_surf, rgba, (0, 0), (diff_x, diff_y), width)
+                else:
+                    pygame.draw.line(shape_surf, rgba, (0, diff_y), (diff_x, 0), width)
             else:
-                pygame.draw.line(shape_surf, color.get(), (0, 0), (0, rect.bottom), width)
-        surface.blit(shape_surf, rect)
+                if horz:
+                    pygame.draw.line(shape_surf, rgba, (0, 0), (end, 0), width)
+                else:
+                    pygame.draw.line(shape_surf, rgba, (0, 0), (0, end), width)
+            return shape_surf
+
+        key = ('line', rect.size, rgba, width, rot_angle, diag, horz, down, end)
+        surface.blit(Shape.cache.get(key, build), rect)
 
     @staticmethod
     def rect(surface: pygame.Surface, color: Color, rect: pygame.Rect, width: int = 0, border_radius: int = -1, rot_angle: int = 0):
-        shape_surf = pygame.Surface(pygame.Rect(rect).size, pygame.SRCALPHA)
-        if rot_angle > 0:
-            shape_surf = pygame.transform.rotate(shape_surf, rot_angle)
-        pygame.draw.rect(shape_surf, color.get(), shape_surf.get_rect(), width=width, border_radius=border_radius)
-        surface.blit(shape_surf, rect)
+        size = pygame.Rect(rect).size
+        rgba = color.get()
+
+        def build() -> pygame.Surface:
+            shape_surf = pygame.Surface(size, pygame.SRCALPHA)
+            if rot_angle > 0:
+                shape_surf = pygame.transform.rotate(shape_surf, rot_angle)
+            pygame.draw.rect(shape_surf, rgba, shape_surf.get_rect(), width=width, border_radius=border_radius)
+            return shape_surf
+
+        key = ('rect', size, rgba, width, border_radius, rot_angle)
+        surface.blit(Shape.cache.get(key, build), rect)
 
     @staticmethod
     def circle(surface: pygame.Surface, color: Color, center: Tuple[int], radius: int, width: int = 0):
         target_rect = pygame.Rect(center, (0, 0)).inflate((radius * 2, radius * 2))
-        shape_surf = pygame.Surface(target_rect.size, pygame.SRCALPHA)
-        pygame.draw.circle(shape_surf, color.get(), (radius, radius), radius, width=width)
-        surface.blit(shape_surf, target_rect)
+        rgba = color.get()
+
+        def build() -> pygame.Surface:
+            shape_surf = pygame.Surface(target_rect.size, pygame.SRCALPHA)
+            pygame.draw.circle(shape_surf, rgba, (radius, radius), radius, width=width)
+            return shape_surf
+
+        key = ('circle', radius, rgba, width)
+        surface.blit(Shape.cache.get(key, build), target_rect)
 
     @staticmethod
     def polygon(surface: pygame.Surface, color: Color, points: List[int], width: int = 0, rot_angle: int = 0):
         lx, ly = zip(*points)
         min_x, min_y, max_x, max_y = min(lx), min(ly), max(lx), max(ly)
         target_rect = pygame.Rect(min_x, min_y, max_x - min_x, max_y - min_y)
-        shape_surf = pygame.Surface(target_rect.size, pygame.SRCALPHA)
-        if rot_angle > 0:
-            shape_surf = pygame.transform.rotate(shape_surf, rot_angle)
-        pygame.draw.polygon(shape_surf, color.get(), [(x - min_x, y - min_y) for x, y in points], width=width)
-        surface.blit(shape_surf, target_rect)
\ No newline at end of file
+        rgba = color.get()
+        # the shape only depends on the points relative to their bounding box
+        local_points = tuple((x - min_x, y - min_y) for x, y in points)
+
+        def build() -> pygame.Surface:
+            shape_surf = pygame.Surface(target_rect.size, pygame.SRCALPHA)
+            if rot_angle > 0:
+                shape_surf = pygame.transform.rotate(shape_surf, rot_angle)
+            pygame.draw.polygon(shape_surf, rgba, local_points, width=width)
+            return shape_surf
+
+        key = ('polygon', local_points, rgba, width, rot_angle)
+        surface.blit(Shape.cache.get(key, build), target_rect)
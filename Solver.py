@@ -0,0 +1,194 @@
+from __future__ import annotations
+import heapq
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from random import Random
+from typing import Dict, List, Tuple
+
+# neighbour offsets, in the order n, e, s, w
+DIRECTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+@dataclass
+class SolverStats:
+    cells: int = 0
+    seconds: float = 0.0
+    decisions: int = 0
+    backtracks: int = 0
+    restarts: int = 0
+
+    @property
+    def cells_per_sec(self) -> float:
+        return self.cells / self.seconds if self.seconds else 0.0
+
+@dataclass
+class Solver:
+    """
+    Constraint solver for tile sets that are missing signatures (or weighted),
+    where placing tiles row by row can paint itself into a corner.
+
+    Each cell holds the tiles it could still be as an int bitmask (bit i = tiles[i]).
+    The solver repeatedly collapses the lowest-entropy cell to a weighted random
+    tile and propagates the result to the neighbours in all four directions via a
+    work queue. A contradiction undoes the last decision (up to max_backtracks per
+    attempt) and bans that tile; past that it restarts, up to max_restarts times.
+    """
+    tiles: List
+    rng: Random = field(default_factory=Random)
+    max_backtracks: int = 1000
+    max_restarts: int = 10
+
+    # tiles whose given side has each edge color: side -> color -> mask
+    side_masks: List[Dict[int, int]] = field(init=False)
+    weights: List[float] = field(init=False)
+    weighted: bool = field(init=False)
+    all_tiles: int = field(init=False)
+    stats: SolverStats = field(default_factory=SolverStats)
+
+    def __post_init__(self):
+        self.weights = [getattr(t, 'weight', 1.0) for t in self.tiles]
+        self.weighted = any(w != 1.0 for w in self.weights)
+        self.all_tiles = (1 << len(self.tiles)) - 1
+        self.side_masks = [{}, {}, {}, {}]
+        for i, t in enumerate(self.tiles):
+            for side, color in enumerate((t.sides.n, t.sides.e, t.sides.s, t.sides.w)):
+                self.side_masks[side][color] = self.side_masks[side].get(color, 0) | (1 << i)
+
+    def allowed(self, mask: int, direction: int) -> int:
+        """
+        Returns the tiles that can sit in `direction` of a cell that can be any of `mask`.
+        """
+        facing = self.side_masks[direction]
+        opposite = self.side_masks[(direction + 2) % 4]
+        result = 0
+        for color, tiles_with_color in facing.items():
+            if mask & tiles_with_color:
+                result |= opposite.get(color, 0)
+        return result
+
+    def entropy(self, mask: int) -> float:
+        if not self.weighted:
+            return math.log(mask.bit_count())
+        total = 0.0
+        total_log = 0.0
+        while mask:
+            low = mask & -mask
+            w = self.weights[low.bit_length() - 1]
+            total += w
+            total_log += w * math.log(w) if w > 0 else 0.0
+            mask ^= low
+        return math.log(total) - total_log / total if total > 0 else 0.0
+
+    def pick(self, mask: int) -> int:
+        choices = []
+        weights = []
+        while mask:
+            low = mask & -mask
+            i = low.bit_length() - 1
+            choices.append(i)
+            weights.append(self.weights[i])
+            mask ^= low
+        if sum(weights) <= 0:
+            return self.rng.choice(choices)
+        return self.rng.choices(choices, weights)[0]
+
+    def solve(self, width: int, height: int, initial: List[int] = None) -> List[int]:
+        """
+        Returns a row-major list of width * height tile indices. `initial` can
+        restrict cells up front, as a list of bitmasks (e.g. to pin border tiles).
+        """
+        self.stats = SolverStats(cells=width * height)
+        start = time.perf_counter()
+        try:
+            for attempt in range(self.max_restarts + 1):
+                self.stats.restarts = attempt
+                cells = self.attempt(width, height, initial)
+                if cells is not None:
+                    return [c.bit_length() - 1 for c in cells]
+            raise ValueError(f'Could not solve a {width}x{height} grid with this tile set!')
+        finally:
+            self.stats.seconds = time.perf_counter() - start
+
+    def attempt(self, width: int, height: int, initial: List[int] = None) -> List[int]|None:
+        n = width * height
+        cells = list(initial) if initial is not None else [self.all_tiles] * n
+        # (cell, old mask) for every change, so decisions can be undone
+        trail: List[Tuple[int, int]] = []
+        # (trail length before the decision, cell, tile picked)
+        decisions: List[Tuple[int, int, int]] = []
+        heap = []
+        backtracks = 0
+
+        def push(i: int) -> None:
+            if cells[i].bit_count() > 1:
+                heapq.heappush(heap, (self.entropy(cells[i]), self.rng.random(), i, cells[i]))
+
+        def propagate(queue: deque) -> bool:
+            while queue:
+                i = queue.popleft()
+                x = i % width
+                y = i // width
+                mask = cells[i]
+                for d, (dx, dy) in enumerate(DIRECTIONS):
+                    nx = x + dx
+                    ny = y + dy
+                    if nx < 0 or ny < 0 or nx >= width or ny >= height:
+                        continue
+                    j = ny * width + nx
+                    new = cells[j] & self.allowed(mask, d)
+                    if new != cells[j]:
+                        if new == 0:
+                            return False
+                        trail.append((j, cells[j]))
+                        cells[j] = new
+                        push(j)
+                        queue.append(j)
+            return True
+
+        # cells only get propagated once they change, so start from a consistent
+        # grid: propagate everything if the starting masks may not be (a pinned
+        # cell, or a tile whose edge no tile can face, e.g. a one tile set)
+        if initial is not None or any(self.allowed(self.all_tiles, d) != self.all_tiles for d in range(4)):
+            if 0 in cells or not propagate(deque(range(n))):
+                return None
+        for i in range(n):
+            push(i)
+
+        while True:
+            # lowest entropy cell that is still undecided, skipping stale heap entries
+            i = None
+            while heap:
+                _, _, j, mask = heapq.heappop(heap)
+                if cells[j] == mask and mask.bit_count() > 1:
+                    i = j
+                    break
+            if i is None:
+                return cells
+
+            tile = self.pick(cells[i])
+            self.stats.decisions += 1
+            decisions.append((len(trail), i, tile))
+            trail.append((i, cells[i]))
+            cells[i] = 1 << tile
+
+            ok = propagate(deque([i]))
+            while not ok:
+                # undo the last decision and rule out the tile it picked; if that
+                # leaves the cell with nothing, undo the decision before it too
+                backtracks += 1
+                self.stats.backtracks += 1
+                if not decisions or backtracks > self.max_backtracks:
+                    return None
+                mark, i, tile = decisions.pop()
+                while len(trail) > mark:
+                    j, old = trail.pop()
+                    cells[j] = old
+                    push(j)
+                remaining = cells[i] & ~(1 << tile)
+                if remaining == 0:
+                    continue
+                trail.append((i, cells[i]))
+                cells[i] = remaining
+                push(i)
+                ok = propagate(deque([i]))
@@ -0,0 +1,171 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Tuple
+import pygame
+import numpy as np
+from _math import Vec2
+
+@dataclass
+class Viewport:
+    """
+    Zoomed view of a tile grid. Zoom moves in steps of zoom_step; each step is a
+    bucket with its own tile size, and the tiles are smoothscaled once per bucket
+    and kept in a small LRU, so drawing only ever blits ready-made surfaces, and
+    only for the cells that intersect the screen.
+
+    Once tiles get smaller than overview_below pixels the grid is drawn from an
+    overview instead: the whole grid rendered once at overview_tile_px pixels per
+    tile, scaled to the current bucket.
+
+    The camera (kept by the caller) is the map pixel, at zoom 1, shown at the
+    screen's top left corner.
+    """
+    tile_w: int = 32
+    tile_h: int = 32
+    zoom_step: float = 2 ** 0.25
+    level: int = 0
+    min_level: int = -16
+    max_level: int = 12
+    overview_below: int = 8
+    overview_tile_px: int = 2
+    max_cached_zooms: int = 8
+
+    # tile size -> the tiles scaled to that size
+    scaled: OrderedDict = field(default_factory=OrderedDict)
+    overview: pygame.Surface = None
+    scaled_overview: pygame.Surface = None
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def zoom(self) -> float:
+        return self.zoom_step ** self.level
+
+    def tile_size(self) -> Tuple[int, int]:
+        zoom = self.zoom
+        return max(1, round(self.tile_w * zoom)), max(1, round(self.tile_h * zoom))
+
+    def offset(self, camera: Vec2) -> Tuple[int, int]:
+        """
+        Returns the camera position in screen pixels at the current zoom.
+        """
+        tw, th = self.tile_size()
+        return int(camera.x * tw / self.tile_w), int(camera.y * th / self.tile_h)
+
+    def to_map(self, dx: float, dy: float) -> Tuple[float, float]:
+        """
+        Converts a distance on screen to a distance in map pixels at zoom 1.
+        """
+        tw, th = self.tile_size()
+        return dx * self.tile_w / tw, dy * self.tile_h / th
+
+    def zoom_by(self, steps: int, camera: Vec2, anchor: Tuple[int, int] = (0, 0)) -> bool:
+        """
+        Zooms in (steps > 0) or out, keeping the map point under `anchor` (a screen
+        position, usually the mouse) in place. Returns whether the zoom changed.
+        """
+        level = min(self.max_level, max(self.min_level, self.level + steps))
+        if level == self.level:
+            return False
+        ax, ay = self.to_map(anchor[0], anchor[1])
+        self.level = level
+        bx, by = self.to_map(anchor[0], anchor[1])
+        camera.x += ax - bx
+        camera.y += ay - by
+        return True
+
+    def uses_overview(self) -> bool:
+        tw, th = self.tile_size()
+        return tw < self.overview_below or th < self.overview_below
+
+    def cell_rect(self, col: int, row: int, camera: Vec2) -> pygame.Rect:
+        tw, th = self.tile_size()
+        ox, oy = self.offset(camera)
+        return pygame.Rect(col * tw - ox, row * th - oy, tw, th)
+
+    def scaled_tiles(self, tiles: List, size: Tuple[int, int]) -> List[pygame.Surface]:
+        surfaces = self.scaled.get(size)
+        if surfaces is not None:
+            self.hits += 1
+            self.scaled.move_to_end(size)
+            return surfaces
+        self.misses += 1
+        surfaces = [scale(t.surface, size) for t in tiles]
+        self.scaled[size] = surfaces
+        if len(self.scaled) > self.max_cached_zooms:
+            self.scaled.popitem(last=False)
+        return surfaces
+
+    def invalidate(self) -> None:
+        """
+        Call when the grid changes; the overview is rebuilt on the next draw.
+        """
+        self.overview = None
+        self.scaled_overview = None
+
+    def clear(self) -> None:
+        """
+        Call when the tiles change; drops every scaled tile.
+        """
+        self.scaled.clear()
+        self.invalidate()
+
+    def build_overview(self, grid: np.ndarray, tiles: List) -> pygame.Surface:
+        rows, cols = grid.shape
+        px = self.overview_tile_px
+        surfaces = self.scaled_tiles(tiles, (px, px))
+        overview = pygame.Surface((cols * px, rows * px), pygame.SRCALPHA)
+        blits = []
+        for y, row in enumerate(grid.tolist()):
+            for x, ti in enumerate(row):
+                if ti < len(surfaces):
+                    blits.append((surfaces[ti], (x * px, y * px)))
+        overview.blits(blits, doreturn=False)
+        return overview
+
+    def draw(self, surface: pygame.Surface, grid: np.ndarray, tiles: List, camera: Vec2) -> int:
+        """
+        Draws the part of the (rows, cols) grid of indices into `tiles` inside
+        `surface`'s clip rect; indices past the end of `tiles` are empty cells.
+        Returns the number of blits.
+        """
+        rows, cols = grid.shape
+        tw, th = self.tile_size()
+        ox, oy = self.offset(camera)
+
+        if self.uses_overview():
+            size = (cols * tw, rows * th)
+            if self.scaled_overview is None or self.scaled_overview.get_size() != size:
+                if self.overview is None:
+                    self.overview = self.build_overview(grid, tiles)
+                self.scaled_overview = scale(self.overview, size)
+            # blit clips to the surface, so only the visible part is copied
+            surface.blit(self.scaled_overview, (-ox, -oy))
+            return 1
+
+        # only the cells under the clip rect (the whole surface unless set)
+        clip = surface.get_clip()
+        x0 = max(0, (ox + clip.x) // tw)
+        y0 = max(0, (oy + clip.y) // th)
+        x1 = min(cols, (ox + clip.right - 1) // tw + 1)
+        y1 = min(rows, (oy + clip.bottom - 1) // th + 1)
+        if x0 >= x1 or y0 >= y1:
+            return 0
+
+        scaled = self.scaled_tiles(tiles, (tw, th))
+        n = len(scaled)
+        blits = []
+        for y in range(y0, y1):
+            py = y * th - oy
+            for x, ti in enumerate(grid[y, x0:x1].tolist(), x0):
+                if ti < n:
+                    blits.append((scaled[ti], (x * tw - ox, py)))
+        surface.blits(blits, doreturn=False)
+        return len(blits)
+
+def scale(surface: pygame.Surface, size: Tuple[int, int]) -> pygame.Surface:
+    # smoothscale only handles 24 and 32 bit surfaces
+    if surface.get_bytesize() in (3, 4):
+        return pygame.transform.smoothscale(surface, size)
+    return pygame.transform.scale(surface, size)
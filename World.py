@@ -0,0 +1,186 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Tuple
+import pygame
+import numpy as np
+import wang
+
+# splitmix64 constants, used to turn (seed, edge position) into an edge color
+_MIX_X = np.uint64(0x9E3779B97F4A7C15)
+_MIX_Y = np.uint64(0xC2B2AE3D27D4EB4F)
+# a plain int: the seed is mixed in Python, where numpy scalars would warn on overflow
+_MIX_SEED = 0x165667B19E3779F9
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+HORZ = 0
+VERT = 1
+# salt for the per-cell draws that choose between tiles sharing a signature
+CELL = 2
+
+def _hash(seed: int, salt: int, gx: np.ndarray, gy: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer over the position, mixed with the seed and salt
+    z = gx.astype(np.int64).view(np.uint64) * _MIX_X
+    z ^= gy.astype(np.int64).view(np.uint64) * _MIX_Y
+    z ^= np.uint64(((((seed << 2) | salt) & _MASK_64) * _MIX_SEED) & _MASK_64)
+    z ^= z >> np.uint64(30)
+    z *= _MIX_1
+    z ^= z >> np.uint64(27)
+    z *= _MIX_2
+    z ^= z >> np.uint64(31)
+    return z
+
+def edge_colors(seed: int, axis: int, gx: np.ndarray, gy: np.ndarray, colors: int = 2) -> np.ndarray:
+    """
+    Returns the color id (0 to colors-1) of every edge at the given global cell coordinates.
+    The color only depends on the seed and the edge's position, so two chunks that
+    share a border always agree on it, and any chunk can be regenerated exactly.
+    """
+    return ((_hash(seed, axis, gx, gy) >> np.uint64(32)) % np.uint64(colors)).astype(np.uint8)
+
+def cell_draws(seed: int, gx: np.ndarray, gy: np.ndarray) -> np.ndarray:
+    """
+    Returns a uniform draw in [0, 1) for every cell, fixed by the seed and the
+    cell's position like edge_colors.
+    """
+    return (_hash(seed, CELL, gx, gy) >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+def generate_region(table: wang.SignatureTable, seed: int, gx0: int, gy0: int, width: int, height: int) -> np.ndarray:
+    """
+    Returns the (height, width) tile indices of the region whose top left cell is
+    (gx0, gy0). Regions generated from the same seed always fit together.
+    """
+    colors = table.colors
+    # edges above every cell plus the bottom edges of the last row
+    hy, hx = np.mgrid[gy0:gy0 + height + 1, gx0:gx0 + width]
+    horz = edge_colors(seed, HORZ, hx, hy, colors)
+    # edges left of every cell plus the right edges of the last column
+    vy, vx = np.mgrid[gy0:gy0 + height, gx0:gx0 + width + 1]
+    vert = edge_colors(seed, VERT, vx, vy, colors)
+    u = None
+    if table.max_count > 1:
+        cy, cx = np.mgrid[gy0:gy0 + height, gx0:gx0 + width]
+        u = cell_draws(seed, cx, cy)
+
+    return wang.tiles_from_edges(table, horz, vert, u)
+
+@dataclass
+class Chunk:
+    cx: int
+    cy: int
+    tiles: np.ndarray
+    surface: pygame.Surface = None
+
+    def nbytes(self) -> int:
+        n = self.tiles.nbytes
+        if self.surface is not None:
+            n += self.surface.get_width() * self.surface.get_height() * self.surface.get_bytesize()
+        return n
+
+@dataclass
+class World:
+    """
+    An unbounded map split into chunk_w x chunk_h tile chunks. Chunks are generated
+    lazily from the world seed and their coordinates and kept in an LRU cache that
+    stays under memory_budget bytes; evicted chunks are simply regenerated.
+
+    `table` is the signature table (see wang.signature_table) for `tiles`.
+    """
+    tiles: List
+    table: wang.SignatureTable
+    seed: int = 0
+    chunk_w: int = 32
+    chunk_h: int = 32
+    tile_w: int = 32
+    tile_h: int = 32
+    memory_budget: int = 64 * 1024 * 1024
+
+    colors: int = 2
+    chunks: OrderedDict = field(default_factory=OrderedDict)
+    memory_used: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def __post_init__(self):
+        if not wang.is_complete(self.table):
+            raise ValueError('World mode needs a complete tile set (every edge signature)!')
+        self.colors = self.table.colors
+
+    def reseed(self, seed: int) -> None:
+        self.seed = seed
+        self.chunks.clear()
+        self.memory_used = 0
+
+    def generate_chunk(self, cx: int, cy: int) -> np.ndarray:
+        return generate_region(self.table, self.seed, cx * self.chunk_w, cy * self.chunk_h, self.chunk_w, self.chunk_h)
+
+    def get_chunk(self, cx: int, cy: int) -> Chunk:
+        key = (cx, cy)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.hits += 1
+            self.chunks.move_to_end(key)
+            return chunk
+
+        self.misses += 1
+        chunk = Chunk(cx, cy, self.generate_chunk(cx, cy))
+        self.chunks[key] = chunk
+        self.memory_used += chunk.nbytes()
+        self.evict()
+        return chunk
+
+    def render_chunk(self, chunk: Chunk) -> pygame.Surface:
+        if chunk.surface is None:
+            surface = pygame.Surface((self.chunk_w * self.tile_w, self.chunk_h * self.tile_h))
+            blits = []
+            for y, row in enumerate(chunk.tiles.tolist()):
+                for x, ti in enumerate(row):
+                    blits.append((self.tiles[ti].surface, (x * self.tile_w, y * self.tile_h)))
+            surface.blits(blits, doreturn=False)
+            chunk.surface = surface
+            self.memory_used += chunk.nbytes() - chunk.tiles.nbytes
+            self.evict(keep=(chunk.cx, chunk.cy))
+        return chunk.surface
+
+    def evict(self, keep: Tuple[int, int] = None) -> None:
+        while self.memory_used > self.memory_budget and len(self.chunks) > 1:
+            key = next(iter(self.chunks))
+            if key == keep:
+                self.chunks.move_to_end(key)
+                key = next(iter(self.chunks))
+            chunk = self.chunks.pop(key)
+            self.memory_used -= chunk.nbytes()
+            self.evictions += 1
+
+    def tile_at(self, gx: int, gy: int) -> int:
+        """
+        Returns the index into tiles of the tile at global cell (gx, gy).
+        """
+        chunk = self.get_chunk(gx // self.chunk_w, gy // self.chunk_h)
+        return int(chunk.tiles[gy % self.chunk_h, gx % self.chunk_w])
+
+    def draw(self, surface: pygame.Surface, camera_x: int, camera_y: int) -> int:
+        """
+        Draws the part of the world inside `surface`'s clip rect, with (camera_x, camera_y)
+        being the world pixel at the surface's top left corner. Returns the number
+        of chunk surfaces blitted.
+        """
+        chunk_px_w = self.chunk_w * self.tile_w
+        chunk_px_h = self.chunk_h * self.tile_h
+        # only the chunks under the clip rect (the whole surface unless set)
+        clip = surface.get_clip()
+        first_cx = (camera_x + clip.x) // chunk_px_w
+        first_cy = (camera_y + clip.y) // chunk_px_h
+        last_cx = (camera_x + clip.right - 1) // chunk_px_w
+        last_cy = (camera_y + clip.bottom - 1) // chunk_px_h
+
+        blits = []
+        for cy in range(first_cy, last_cy + 1):
+            for cx in range(first_cx, last_cx + 1):
+                chunk_surface = self.render_chunk(self.get_chunk(cx, cy))
+                blits.append((chunk_surface, (cx * chunk_px_w - camera_x, cy * chunk_px_h - camera_y)))
+        surface.blits(blits, doreturn=False)
+        return len(blits)
@@ -1,7 +1,8 @@
 from __future__ import annotations
-from typing import Tuple, List, Dict
+from typing import Iterable, Tuple, List, Dict
 from dataclasses import dataclass
 import math
+import numpy as np
 
 def clamp(val: float, minimum: float, maximum: float):
     return max(minimum, min(val, maximum))
@@ -10,7 +11,7 @@ def lerp(a: float, b: float, t: float) -> float:
     r = a + (b - a) * t
     return r
 
-@dataclass
+@dataclass(slots=True)
 class Vec2:
     x: int = 0
     y: int = 0
@@ -45,15 +46,13 @@ class Vec2:
         """
         Returns the magnitude (length) of the vector.
         """
-        return math.sqrt(self.mag_sq())
+        return math.hypot(self.x, self.y)
 
     def dist(self, v: Vec2) -> float:
         """
         Returns the distance between self and the passed-in vectors
         """
-        r = Vec2._copy(self)
-        r.sub(v)
-        return r.mag()
+        return math.hypot(self.x - v.x, self.y - v.y)
 
     def to_tuple(self) -> Tuple[int]:
         return (self.x, self.y)
@@ -66,24 +65,15 @@ class Vec2:
 
     @staticmethod
     def _add(v1: Vec2, v2: Vec2) -> Vec2:
-        v = Vec2(v1.x, v1.y)
-        v.x += v2.x
-        v.y += v2.y
-        return v
+        return Vec2(v1.x + v2.x, v1.y + v2.y)
 
     @staticmethod
     def _sub(v1: Vec2, v2: Vec2) -> Vec2:
-        v = Vec2(v1.x, v1.y)
-        v.x -= v2.x
-        v.y -= v2.y
-        return v
+        return Vec2(v1.x - v2.x, v1.y - v2.y)
 
     @staticmethod
     def _scale(v1: Vec2, s: int|float) -> Vec2:
-        v = Vec2.copy(v1)
-        v.x *= s
-        v.y *= s
-        return v
+        return Vec2(v1.x * s, v1.y * s)
 
     @staticmethod
     def _copy(v: Vec2) -> Vec2:
@@ -91,19 +81,132 @@ class Vec2:
 
     @staticmethod
     def _lerp(v1: Vec2, v2: Vec2, t: float) -> Vec2:
-        v = Vec2.copy(v1)
-        v.x += (v2.x - v1.x) * t
-        v.y += (v2.y - v1.y) * t
-        return v
+        return Vec2(v1.x + (v2.x - v1.x) * t, v1.y + (v2.y - v1.y) * t)
 
     @staticmethod
     def _dist(v1: Vec2, v2: Vec2) -> float:
         """
         Returns the distance between the passed-in vectors
         """
-        r = Vec2._copy(v1)
-        r.sub(v2)
-        return r.mag()
+        return math.hypot(v1.x - v2.x, v1.y - v2.y)
+
+class Vec2Array:
+    """
+    Many 2D vectors stored in one contiguous (n, 2) NumPy array, for doing the
+    same math on a whole map's worth of positions in one call instead of
+    thousands of Vec2s. Operations mirror Vec2: add/sub/scale/lerp work in place,
+    the underscore versions return a new Vec2Array.
+
+    The `other` argument of the operations can be a Vec2, an (x, y) tuple, a
+    scalar or another Vec2Array of the same length.
+    """
+    __slots__ = ('xy',)
+
+    def __init__(self, xy: np.ndarray):
+        self.xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+
+    @staticmethod
+    def zeros(n: int) -> Vec2Array:
+        return Vec2Array(np.zeros((n, 2)))
+
+    @staticmethod
+    def from_vecs(vecs: Iterable[Vec2]) -> Vec2Array:
+        return Vec2Array(np.array([(v.x, v.y) for v in vecs], dtype=np.float64))
+
+    @staticmethod
+    def grid(cols: int, rows: int, step_x: float = 1, step_y: float = 1, origin: Vec2 = None) -> Vec2Array:
+        """
+        Returns the top left corners of a cols x rows grid of step_x x step_y
+        cells, row-major (the same order as Game.grid_tiles).
+        """
+        ys, xs = np.mgrid[0:rows, 0:cols]
+        xy = np.stack([xs.ravel() * step_x, ys.ravel() * step_y], axis=1).astype(np.float64)
+        if origin is not None:
+            xy += (origin.x, origin.y)
+        return Vec2Array(xy)
+
+    @staticmethod
+    def _operand(other) -> np.ndarray|float:
+        if isinstance(other, Vec2Array):
+            return other.xy
+        if isinstance(other, Vec2):
+            return np.array((other.x, other.y), dtype=np.float64)
+        if isinstance(other, tuple):
+            return np.array(other, dtype=np.float64)
+        return other
+
+    def __len__(self) -> int:
+        return len(self.xy)
+
+    def __getitem__(self, i: int) -> Vec2:
+        x, y = self.xy[i]
+        return Vec2(float(x), float(y))
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.xy[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.xy[:, 1]
+
+    def add(self, other) -> None:
+        self.xy += Vec2Array._operand(other)
+
+    def sub(self, other) -> None:
+        self.xy -= Vec2Array._operand(other)
+
+    def scale(self, s) -> None:
+        self.xy *= Vec2Array._operand(s)
+
+    def lerp(self, other, t: float) -> None:
+        self.xy += (Vec2Array._operand(other) - self.xy) * t
+
+    def copy(self) -> Vec2Array:
+        return Vec2Array(self.xy.copy())
+
+    def _add(self, other) -> Vec2Array:
+        return Vec2Array(self.xy + Vec2Array._operand(other))
+
+    def _sub(self, other) -> Vec2Array:
+        return Vec2Array(self.xy - Vec2Array._operand(other))
+
+    def _scale(self, s) -> Vec2Array:
+        return Vec2Array(self.xy * Vec2Array._operand(s))
+
+    def _lerp(self, other, t: float) -> Vec2Array:
+        return Vec2Array(self.xy + (Vec2Array._operand(other) - self.xy) * t)
+
+    def mag(self) -> np.ndarray:
+        return np.hypot(self.xy[:, 0], self.xy[:, 1])
+
+    def dist(self, other) -> np.ndarray:
+        """
+        Returns the distance from every vector to `other`.
+        """
+        d = self.xy - Vec2Array._operand(other)
+        return np.hypot(d[:, 0], d[:, 1])
+
+    def nearest(self, v: Vec2) -> int:
+        """
+        Returns the index of the vector closest to v.
+        """
+        return int(np.argmin(self.dist(v)))
+
+    def inside(self, x: float, y: float, w: float, h: float) -> np.ndarray:
+        """
+        Returns a bool mask of the vectors inside the x, y, w, h rectangle.
+        """
+        px = self.xy[:, 0]
+        py = self.xy[:, 1]
+        return (px >= x) & (px < x + w) & (py >= y) & (py < y + h)
+
+    def to_blit_dests(self) -> List[Tuple[int, int]]:
+        """
+        Returns the vectors as a list of integer (x, y) tuples, ready to pair
+        with surfaces for Surface.blits.
+        """
+        return list(map(tuple, np.floor(self.xy).astype(np.int64).tolist()))
 
 if __name__ == '__main__':
     a = 0
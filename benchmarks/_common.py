@@ -0,0 +1,40 @@
+"""
+Shared setup for the benchmark scripts: runs pygame headless and builds Game
+instances from the repo's tile set without going through main.py.
+"""
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import pygame
+from Game import Game
+
+TILE_SETS_DIR = os.path.join(ROOT, 'tile_sets')
+SETUP_FILE = os.path.join(ROOT, 'setup.json')
+# size of the tiles shipped in tile_sets/
+NATIVE_TILE_SIZE = 32
+
+def make_game(width: int, height: int, tile_size: int = NATIVE_TILE_SIZE, **kwargs) -> Game:
+    """
+    Returns a set up Game drawing to a width x height display, with the tile set
+    scaled to tile_size (Game classifies the edges at the native size).
+    """
+    pygame.display.init()
+    game = Game(width, height, tile_w=tile_size, tile_h=tile_size, tile_sets_dir=TILE_SETS_DIR, seed=0, **kwargs)
+    game.screen = pygame.display.set_mode((width, height))
+    game.load_setup(SETUP_FILE, save_manifest=False)
+    return game
+
+def resize_grid(game: Game, tile_count_w: int, tile_count_h: int) -> None:
+    """
+    Gives `game` an empty tile_count_w x tile_count_h grid and fills it.
+    """
+    game.tile_count_w = tile_count_w
+    game.tile_count_h = tile_count_h
+    game.grid_tiles = game.new_grid(tile_count_w * tile_count_h)
+    game.grid_surface = None
+    game.create_wang_tiles()
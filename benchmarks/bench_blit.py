@@ -0,0 +1,48 @@
+"""
+Compares the old per-cell blit loop against the batched Surface.blits render path.
+
+    python benchmarks/bench_blit.py --width 3840 --height 2160 --tile-size 8
+"""
+import argparse
+from timeit import repeat
+
+from _common import make_game
+from Game import Game
+
+def blit_loop(game: Game) -> None:
+    surf = game.grid_surface
+    for y in range(game.tile_count_h):
+        for x in range(game.tile_count_w):
+            index = y * game.tile_count_w + x
+            tile = game.grid_tiles[index]
+            if tile != game.empty_tile:
+                surf.blit(game.tiles[tile].surface, (x * game.tile_w, y * game.tile_h))
+
+def blits_batched(game: Game) -> None:
+    game.grid_surface.blits(game.grid_blits, doreturn=False)
+
+def full_rebuild(game: Game) -> None:
+    # includes rebuilding the placement list, as happens after create_wang_tiles
+    game.invalidate_grid()
+    game.render_grid()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=960)
+    parser.add_argument('--tile-size', type=int, nargs='+', default=[32, 16, 8])
+    parser.add_argument('--number', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for tile_size in args.tile_size:
+        game = make_game(args.width, args.height, tile_size)
+        game.render_grid()
+        cells = game.tile_count_w * game.tile_count_h
+        print(f'{args.width}x{args.height} @ {tile_size}px ({cells} cells)')
+        for name, fn in [('loop', blit_loop), ('blits', blits_batched), ('rebuild', full_rebuild)]:
+            best = min(repeat(lambda: fn(game), number=args.number, repeat=args.repeat)) / args.number
+            print(f'  {name:<8} {best * 1000:8.3f} ms/frame')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark suite for the hot paths: tile picking, grid generation, drawing and
+startup. Runs headless and writes the results as JSON so runs from different
+versions can be compared.
+
+    python benchmarks/run_benchmarks.py --out bench.json
+    python benchmarks/run_benchmarks.py --quick
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+from statistics import median
+from typing import Callable, Dict, List
+
+from _common import ROOT, TILE_SETS_DIR, make_game, resize_grid
+import numpy as np
+import pygame
+from Game import Game
+
+def timed(fn: Callable[[], None], repeat: int, number: int = 1) -> Dict[str, float]:
+    """
+    Runs fn number times per sample, repeat samples, and returns per-call seconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t) / number)
+    return {'min': min(samples), 'median': median(samples), 'max': max(samples)}
+
+def bench_get_rand_tile(game: Game, repeat: int) -> List[dict]:
+    resize_grid(game, 1000, 100)
+    cells = len(game.grid_tiles)
+    # skip row 0 / column 0 so every call checks both neighbours
+    indices = [i for i in range(cells) if i >= game.tile_count_w and i % game.tile_count_w]
+
+    def run():
+        for i in indices:
+            game.get_rand_tile(i)
+
+    t = timed(run, repeat)
+    return [{'calls': len(indices), 'seconds': t, 'calls_per_sec': len(indices) / t['min']}]
+
+def bench_create_wang_tiles(game: Game, sizes: List[int], max_sequential: int, repeat: int) -> List[dict]:
+    results = []
+    for cells in sizes:
+        w = int(round(cells ** 0.5))
+        h = max(1, cells // w)
+        for mode in ['sequential', 'vectorized']:
+            if mode == 'sequential' and w * h > max_sequential:
+                continue
+            game.generator_mode = mode
+            resize_grid(game, w, h)
+            t = timed(game.create_wang_tiles, repeat)
+            results.append({'mode': mode, 'cells': w * h, 'width': w, 'height': h,
+                            'seconds': t, 'cells_per_sec': w * h / t['min']})
+    game.generator_mode = 'sequential'
+    return results
+
+def bench_draw(screens: List[str], tile_sizes: List[int], repeat: int, number: int) -> List[dict]:
+    results = []
+    for screen in screens:
+        width, height = (int(v) for v in screen.split('x'))
+        for tile_size in tile_sizes:
+            game = make_game(width, height, tile_size)
+            game.draw()
+            # a few cells spread over the screen, as when stepping through the grid
+            cells = range(0, len(game.grid_tiles), max(1, len(game.grid_tiles) // 16))
+
+            def stepped():
+                for i in cells:
+                    game.set_grid_tile(i, game.grid_tiles[i])
+                game.check_tile_north = cells[0]
+                game.check_tile_west = cells[-1]
+                game.draw()
+
+            def regenerated():
+                game.invalidate_grid()
+                game.draw()
+
+            results.append({
+                'screen': screen,
+                'tile_size': tile_size,
+                'cells': len(game.grid_tiles),
+                # a few cells and the neighbour highlights changed, only their rects are redrawn
+                'partial_frame': timed(stepped, repeat, number),
+                # the frame right after create_wang_tiles, the whole grid is re-rendered
+                'full_redraw_frame': timed(regenerated, repeat, number),
+            })
+    return results
+
+def bench_startup(repeat: int) -> List[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_file = os.path.join(tmp, 'setup.json')
+
+        def startup(save_manifest: bool):
+            game = Game(1920, 960, tile_sets_dir=TILE_SETS_DIR, seed=0)
+            game.screen = pygame.display.get_surface()
+            game.load_setup(setup_file, save_manifest=save_manifest)
+
+        def cold():
+            if os.path.exists(setup_file):
+                os.remove(setup_file)
+            startup(False)
+
+        results.append({'manifest': 'cold', 'seconds': timed(cold, repeat)})
+        startup(True)
+        results.append({'manifest': 'warm', 'seconds': timed(lambda: startup(False), repeat)})
+    return results
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'pygame': pygame.version.ver,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', default='bench_output.json', help='JSON file to write the results to')
+    parser.add_argument('--cells', type=int, nargs='+', default=[10**3, 10**4, 10**5, 10**6, 10**7],
+                        help='grid sizes (in cells) for create_wang_tiles')
+    parser.add_argument('--max-sequential-cells', type=int, default=10**6,
+                        help='largest grid to run the (slow) sequential generator on')
+    parser.add_argument('--screens', nargs='+', default=['1920x960', '3840x2160'])
+    parser.add_argument('--tile-sizes', type=int, nargs='+', default=[32, 16, 8])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=10, help='frames per draw sample')
+    parser.add_argument('--quick', action='store_true', help='small sizes, few repeats; for a smoke test')
+    args = parser.parse_args()
+
+    if args.quick:
+        args.cells = [10**3, 10**4]
+        args.screens = ['640x480']
+        args.tile_sizes = [32, 8]
+        args.repeat = 2
+        args.number = 2
+
+    game = make_game(1920, 960)
+    results = {'environment': environment()}
+
+    print('startup')
+    results['startup'] = bench_startup(args.repeat)
+    print('get_rand_tile')
+    results['get_rand_tile'] = bench_get_rand_tile(game, args.repeat)
+    print('create_wang_tiles')
+    results['create_wang_tiles'] = bench_create_wang_tiles(game, args.cells, args.max_sequential_cells, args.repeat)
+    print('draw')
+    results['draw'] = bench_draw(args.screens, args.tile_sizes, args.repeat, args.number)
+
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f'wrote {args.out}')
+
+if __name__ == '__main__':
+    main()
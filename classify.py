@@ -0,0 +1,82 @@
+from __future__ import annotations
+from typing import List, Tuple
+import pygame
+import numpy as np
+
+# order of the edges in the arrays returned by edge_colors
+N, E, S, W = range(4)
+
+def edge_colors(atlas: pygame.Surface, rects: List[pygame.Rect], inset: int = 1) -> np.ndarray:
+    """
+    Samples the edge strips of every tile in `atlas` at once and returns a
+    (len(rects), 4, 3) array with the median RGB color of each tile's n/e/s/w edge.
+
+    Strips run `inset` pixels in from the border and only cover the middle half of
+    the edge, so corner details and outlines don't bleed into the sample.
+    """
+    pixels = pygame.surfarray.array3d(atlas)
+    tw, th = rects[0].size
+    x0 = np.array([r.x for r in rects])
+    y0 = np.array([r.y for r in rects])
+
+    along_x = np.arange(tw // 4, tw - tw // 4)
+    along_y = np.arange(th // 4, th - th // 4)
+
+    # surfarray indexes as [x, y]
+    n = pixels[x0[:, None] + along_x, (y0 + inset)[:, None]]
+    s = pixels[x0[:, None] + along_x, (y0 + th - 1 - inset)[:, None]]
+    w = pixels[(x0 + inset)[:, None], y0[:, None] + along_y]
+    e = pixels[(x0 + tw - 1 - inset)[:, None], y0[:, None] + along_y]
+
+    strips = [np.median(strip, axis=1) for strip in (n, e, s, w)]
+    return np.stack(strips, axis=1)
+
+def cluster(colors: np.ndarray, palette: List[Tuple[int, int, int]] = None,
+            tolerance: float = 32.0, k: int = None) -> Tuple[np.ndarray, List[Tuple[int, int, int]]]:
+    """
+    Groups edge colors (an (..., 3) array) into edge color ids.
+
+    Colors within `tolerance` (RGB distance) of an existing palette entry get
+    that entry's id, anything else starts a new entry, so passing the palette
+    from a previous run keeps ids stable. With `k` set, the palette is instead
+    refined with a few rounds of k-means into exactly k colors.
+
+    Returns (ids with the same leading shape as `colors`, palette).
+    """
+    flat = colors.reshape(-1, 3).astype(np.float64)
+    centers = [np.asarray(c, dtype=np.float64) for c in (palette or [])]
+
+    uniq, inverse = np.unique(np.rint(flat), axis=0, return_inverse=True)
+    for c in uniq:
+        if not centers or np.min(np.linalg.norm(np.array(centers) - c, axis=1)) > tolerance:
+            centers.append(c)
+    centers = np.array(centers)
+
+    if k is not None:
+        centers = _kmeans(flat, centers, k, keep=len(palette or []))
+
+    dist = np.linalg.norm(uniq[:, None, :] - centers[None, :, :], axis=2)
+    ids = np.argmin(dist, axis=1)[inverse.ravel()]
+
+    palette = [tuple(int(v) for v in np.rint(c)) for c in centers]
+    return ids.reshape(colors.shape[:-1]), palette
+
+def _kmeans(points: np.ndarray, seeds: np.ndarray, k: int, iterations: int = 10, keep: int = 0) -> np.ndarray:
+    # the first `keep` seeds (a palette passed in) start the centers in order, so
+    # their ids survive; the rest is a farthest point init over the other seeds,
+    # topped up from the points themselves if there are fewer than k seeds
+    keep = min(keep, k)
+    candidates = seeds if len(seeds) >= k else np.concatenate([seeds, points])
+    centers = list(seeds[:keep]) if keep else [candidates[0]]
+    while len(centers) < k:
+        d = np.min(np.linalg.norm(candidates[:, None, :] - np.array(centers)[None, :, :], axis=2), axis=1)
+        centers.append(candidates[np.argmax(d)])
+    centers = np.array(centers, dtype=np.float64)
+
+    for _ in range(iterations):
+        labels = np.argmin(np.linalg.norm(points[:, None, :] - centers[None, :, :], axis=2), axis=1)
+        for i in range(k):
+            members = points[labels == i]
+            if len(members):
+                centers[i] = members.mean(axis=0)
+    return centers
@@ -1,18 +1,58 @@
 from __future__ import annotations
-from dataclasses import dataclass, fields
-from typing import List, Tuple
+from dataclasses import dataclass, field, fields
+from typing import ClassVar, Dict, List, Tuple
+from weakref import ref
+import pygame
 from _math import clamp, lerp
 
-@dataclass
+# how many distinct colors Color keeps interned; colors made past that are still
+# immutable and precomputed, just not shared
+INTERN_LIMIT = 4096
+
+@dataclass(frozen=True, slots=True, init=False)
 class Color:
     """
     Color works between 0.0 and 1.0 to make the math easier. Static methods available
     to return a tuple of ints in the range 0-255 as well as hex strings.
+
+    Colors are immutable and interned: Color(r, g, b, a) returns the same instance
+    for the same values, with the 255, float and hex forms computed once up front.
     """
     r: float = 0.0
     g: float = 0.0
     b: float = 0.0
     a: float = 1.0
+    rgba: Tuple[int, int, int, int] = field(default=None, repr=False, compare=False)
+    rgba_float: Tuple[float, float, float, float] = field(default=None, repr=False, compare=False)
+    hex: str = field(default=None, repr=False, compare=False)
+    # id(surface) -> (weakref to surface, surface.map_rgb(rgba))
+    _mapped: Dict[int, Tuple[ref, int]] = field(default=None, repr=False, compare=False)
+
+    _interned: ClassVar[Dict[Tuple[float, float, float, float], Color]] = {}
+
+    def __new__(cls, r: float = 0.0, g: float = 0.0, b: float = 0.0, a: float = 1.0) -> Color:
+        key = (r, g, b, a)
+        color = cls._interned.get(key)
+        if color is not None:
+            return color
+
+        color = object.__new__(cls)
+        set_ = object.__setattr__
+        set_(color, 'r', r)
+        set_(color, 'g', g)
+        set_(color, 'b', b)
+        set_(color, 'a', a)
+        rgba = (int(r*255), int(g*255), int(b*255), int(a*255))
+        set_(color, 'rgba', rgba)
+        set_(color, 'rgba_float', key)
+        set_(color, 'hex', '#' + ''.join(hex(c)[2:].zfill(2) for c in rgba))
+        set_(color, '_mapped', {})
+        if len(cls._interned) < INTERN_LIMIT:
+            cls._interned[key] = color
+        return color
+
+    def __reduce__(self):
+        return (Color, (self.r, self.g, self.b, self.a))
 
     def get(self, return_format: str = '255') -> Tuple[int|float]|str:
         """
@@ -26,26 +66,37 @@ class Color:
 
         """
         if return_format == '255':
-            return Color.to_255_values(self)
+            return self.rgba
         elif return_format == 'float':
-            return Color.to_float(self)
+            return self.rgba_float
         elif return_format == 'hex':
-            return Color.to_hex_str(self)
+            return self.hex
         else:
             raise ValueError(f'Invalid return_format: {return_format}. Available formats: "255", "float", "hex"')
 
+    def mapped(self, surface: pygame.Surface) -> int:
+        """
+        Returns surface.map_rgb() of this color, cached per surface, for fills and
+        pixel writes that would otherwise convert the color on every call.
+        """
+        entry = self._mapped.get(id(surface))
+        if entry is not None and entry[0]() is surface:
+            return entry[1]
+        if len(self._mapped) >= 16:
+            # drop entries for surfaces that have since been freed
+            for k in [k for k, (r, _) in self._mapped.items() if r() is None]:
+                del self._mapped[k]
+        value = surface.map_rgb(self.rgba)
+        self._mapped[id(surface)] = (ref(surface), value)
+        return value
+
     @staticmethod
     def to_float(color: Color) -> Tuple[float]:
-        return color.r, color.g, color.b, color.a
+        return color.rgba_float
 
     @staticmethod
     def to_hex_str(color: Color) -> str:
-        c = Color.to_255_values(color)
-        r = hex(c[0])[2:].zfill(2)
-        g = hex(c[1])[2:].zfill(2)
-        b = hex(c[2])[2:].zfill(2)
-        a = hex(c[3])[2:].zfill(2)
-        return f'#{r}{g}{b}{a}'
+        return color.hex
 
     @staticmethod
     def from_hex_str(hex_str: str) -> Color:
@@ -69,11 +120,12 @@ class Color:
 
     @staticmethod
     def to_255_values(color: Color) -> Tuple[int]:
-        return (int(color.r*255),int(color.g*255),int(color.b*255),int(color.a*255))
+        return color.rgba
 
     @staticmethod
     def copy(color: Color) -> Color:
-        return Color(color.r, color.g, color.b, color.a)
+        # colors are immutable, so a copy is the color itself
+        return color
 
     @staticmethod
     def brighten(color: Color, amount: float = 0.1) -> Color:
@@ -103,7 +155,7 @@ class Color:
         b = clamp(abs(lerp(c1.b, c2.b, t)), 0.0, 1.0)
         return Color(r, g, b, 1.0) # is hard-coding the alpha ok?
 
-@dataclass
+@dataclass(frozen=True)
 class Colors:
     BLACK:      Color = Color(  0/255,   0/255,   0/255, 255/255)
     BLUE:       Color = Color(  0/255,   0/255, 255/255, 255/255)
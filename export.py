@@ -0,0 +1,151 @@
+"""
+Out-of-core export for maps too big to hold as one image.
+
+The tile-index grid is generated strip by strip straight into a memory-mapped
+.npy file (see parallel.generate), then rendered to a PNG one tile row at a
+time: each row of tiles is composed into a surface tile_h pixels tall and its
+pixel rows are compressed and written out before the next row is drawn, so
+memory stays proportional to the map width.
+
+    python export.py --width 4000 --height 4000 --seed 0 --npy map.npy --png map.png
+"""
+import os
+import struct
+import zlib
+import argparse
+from typing import List
+
+import numpy as np
+import pygame
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# PNG color types
+RGB = 2
+RGBA = 6
+
+class PngWriter:
+    """
+    Writes an 8-bit RGB/RGBA PNG row by row. Rows go through one zlib stream
+    and are flushed to IDAT chunks of about idat_size bytes as they fill up.
+    """
+    def __init__(self, path: str, width: int, height: int, alpha: bool = False, idat_size: int = 1 << 20, level: int = 6):
+        self.width = width
+        self.height = height
+        self.channels = 4 if alpha else 3
+        self.idat_size = idat_size
+        self.rows_written = 0
+        self.pending = []
+        self.pending_size = 0
+        self.compressor = zlib.compressobj(level)
+        self.f = open(path, 'wb')
+        self.f.write(PNG_SIGNATURE)
+        self.write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, RGBA if alpha else RGB, 0, 0, 0))
+
+    def write_chunk(self, kind: bytes, data: bytes) -> None:
+        self.f.write(struct.pack('>I', len(data)))
+        self.f.write(kind)
+        self.f.write(data)
+        self.f.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+    def write_rows(self, pixels: bytes) -> None:
+        """
+        Appends whole rows of tightly packed pixels (width * channels bytes per row).
+        """
+        stride = self.width * self.channels
+        rows = len(pixels) // stride
+        if rows * stride != len(pixels):
+            raise ValueError(f'Expected a multiple of {stride} bytes, got {len(pixels)}!')
+        # every row starts with its filter type, 0 = none
+        view = memoryview(pixels)
+        for y in range(rows):
+            self.compress(b'\x00')
+            self.compress(view[y * stride:(y + 1) * stride])
+        self.rows_written += rows
+
+    def compress(self, data) -> None:
+        out = self.compressor.compress(data)
+        if out:
+            self.pending.append(out)
+            self.pending_size += len(out)
+            if self.pending_size >= self.idat_size:
+                self.flush_idat()
+
+    def flush_idat(self) -> None:
+        if self.pending:
+            self.write_chunk(b'IDAT', b''.join(self.pending))
+            self.pending = []
+            self.pending_size = 0
+
+    def close(self) -> None:
+        if self.rows_written != self.height:
+            self.f.close()
+            raise ValueError(f'Wrote {self.rows_written} of {self.height} rows!')
+        self.pending.append(self.compressor.flush())
+        self.flush_idat()
+        self.write_chunk(b'IEND', b'')
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.f.close()
+
+def write_png(path: str, grid: np.ndarray, tiles: List, tile_w: int, tile_h: int, alpha: bool = False) -> None:
+    """
+    Renders a (height, width) grid of indices into `tiles` to a PNG, one row of
+    tiles at a time. `grid` can be a memory map; it's only read a row at a time.
+    Cells holding an index past the end of `tiles` (empty cells) stay black, or
+    transparent with alpha.
+    """
+    height, width = grid.shape
+    surfaces = [t.surface for t in tiles]
+    strip = pygame.Surface((width * tile_w, tile_h), pygame.SRCALPHA if alpha else 0)
+    dests = [(x * tile_w, 0) for x in range(width)]
+    fmt = 'RGBA' if alpha else 'RGB'
+
+    with PngWriter(path, width * tile_w, height * tile_h, alpha) as png:
+        for y in range(height):
+            strip.fill((0, 0, 0, 0))
+            row = grid[y].tolist()
+            strip.blits([(surfaces[ti], pos) for ti, pos in zip(row, dests) if ti < len(surfaces)], doreturn=False)
+            png.write_rows(pygame.image.tobytes(strip, fmt))
+
+def main():
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import parallel
+    from Game import Game
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=1000, help='map width in tiles')
+    parser.add_argument('--height', type=int, default=1000, help='map height in tiles')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--npy', default='map.npy', help='.npy file the tile indices are written to')
+    parser.add_argument('--png', default=None, help='PNG to render the map to, skipped if not given')
+    parser.add_argument('--from-npy', action='store_true', help='render an existing --npy file instead of generating one')
+    parser.add_argument('--tile-size', type=int, default=32)
+    parser.add_argument('--tile-sets', default='./tile_sets')
+    parser.add_argument('--workers', type=int, default=1, help='processes generating strips')
+    args = parser.parse_args()
+
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    game = Game(args.tile_size, args.tile_size, tile_w=args.tile_size, tile_h=args.tile_size,
+                tile_sets_dir=os.path.abspath(args.tile_sets), generator_mode='vectorized')
+    game.load_setup('setup.json', save_manifest=False)
+
+    if args.from_npy:
+        grid = np.load(args.npy, mmap_mode='r')
+    else:
+        grid = parallel.generate(game.tile_signatures, args.width, args.height, args.seed, args.workers, out=args.npy)
+        print(args.npy)
+    if args.png:
+        write_png(args.png, grid, game.tiles, game.tile_w, game.tile_h)
+        print(args.png)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import pygame
+from pygame.constants import RESIZABLE, VIDEORESIZE, MOUSEMOTION, MOUSEWHEEL, SRCALPHA, HWACCEL, MOUSEBUTTONDOWN, MOUSEBUTTONUP, K_RSHIFT, K_LSHIFT, K_F3
+from pygame.locals import KEYDOWN, KEYUP, QUIT, NOEVENT, VIDEOEXPOSE, WINDOWEXPOSED, WINDOWSHOWN, WINDOWRESTORED, WINDOWMAXIMIZED
+from Game import Game, BACKGROUND_DONE
+from FrameStats import FrameStats
+from colors import Colors
+from font import FontUseType
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--stats', action='store_true', help='show the frame timing overlay (toggle with F3)')
+parser.add_argument('--stats-csv', help='write the recorded frame timings to this CSV file on exit')
+parser.add_argument('--fps', type=int, default=30, help='frame rate cap')
+parser.add_argument('--pregenerate', type=int, default=1, help='grids to generate ahead in the background (0 to generate on click)')
+parser.add_argument('--tile-pack', help='load the tiles from a pack written by tilepack.py')
+parser.add_argument('--world', action='store_true', help='endless map generated around the camera (scroll with the arrow keys or by dragging)')
+parser.add_argument('--no-idle', dest='idle', action='store_false', help='keep drawing frames when nothing changes')
+parser.add_argument('--idle-timeout', type=int, default=1000, help='longest wait for an event while idle, in ms')
+args = parser.parse_args()
+
+pygame.init()
+clock = pygame.time.Clock()
+
+gameWidth = 1920
+gameHeight = 960
+game = Game(gameWidth, gameHeight, pregenerate_depth=args.pregenerate, tile_pack_path=args.tile_pack, world_mode=args.world)
+game.screen = pygame.display.set_mode((gameWidth, gameHeight),RESIZABLE|SRCALPHA|HWACCEL)
+game.set_background_color(Colors.DARK_GREY)
+game.register_sys_font('Courier', 12, FontUseType.DEFAULT)
+game.load_setup("setup.json")
+
+stats = FrameStats()
+game.stats = stats
+game.show_stats = args.stats
+
+def on_keydown(event):
+    if event.key == K_F3:
+        game.show_stats = not game.show_stats
+    game.keyboard.update(event.key, event.unicode)
+
+def on_keyup(event):
+    if event.key == K_RSHIFT or event.key == K_LSHIFT:
+        game.keyboard.shift_was_down = False
+    game.keyboard.release(event.key)
+
+def on_mousebuttondown(event):
+    game.mouse.set_pressed(event.button)
+
+def on_mousebuttonup(event):
+    game.mouse.set_released(event.button)
+
+def on_mousewheel(event):
+    game.mouse.set_scroll(event.x, event.y)
+
+def on_mousemotion(event):
+    game.mouse.set_offset(event.rel)
+
+def on_videoresize(event):
+    game.screen = pygame.display.set_mode((event.w,event.h),RESIZABLE|SRCALPHA|HWACCEL)
+    game.resize(event.w, event.h)
+
+def on_expose(event):
+    # the window's contents were lost (uncovered, restored, ...), so the next
+    # frame has to present the whole screen, not just what changed
+    game.screen_dirty = True
+
+def on_quit(event):
+    game.running = False
+
+def on_background_done(event):
+    # nothing to do, the event only wakes the loop up
+    ...
+
+EVENT_HANDLERS = {
+    KEYDOWN: on_keydown,
+    KEYUP: on_keyup,
+    MOUSEBUTTONDOWN: on_mousebuttondown,
+    MOUSEBUTTONUP: on_mousebuttonup,
+    MOUSEWHEEL: on_mousewheel,
+    MOUSEMOTION: on_mousemotion,
+    VIDEORESIZE: on_videoresize,
+    VIDEOEXPOSE: on_expose,
+    WINDOWEXPOSED: on_expose,
+    WINDOWSHOWN: on_expose,
+    WINDOWRESTORED: on_expose,
+    WINDOWMAXIMIZED: on_expose,
+    QUIT: on_quit,
+    BACKGROUND_DONE: on_background_done,
+}
+
+# don't let SDL queue events nobody handles
+pygame.event.set_blocked(None)
+pygame.event.set_allowed(list(EVENT_HANDLERS))
+
+while game.running:
+    events = []
+    if args.idle and game.is_idle() and not pygame.event.peek():
+        # nothing would change on screen, so sleep until something happens
+        stats.begin('idle')
+        event = pygame.event.wait(args.idle_timeout)
+        stats.end('idle')
+        if event.type != NOEVENT:
+            events.append(event)
+        elif not game.show_stats:
+            stats.end_frame()
+            continue
+        # else timed out with the overlay up: draw a frame anyway, so its idle
+        # totals keep up (draw only redraws the overlay's rect)
+
+    stats.begin('events')
+    events.extend(pygame.event.get())
+    for event in events:
+        handler = EVENT_HANDLERS.get(event.type)
+        if handler is not None:
+            handler(event)
+    stats.end('events')
+
+    game.mouse.set_pos(pygame.mouse.get_pos())
+    stats.begin('update')
+    game.update()
+    stats.end('update')
+    stats.begin('draw')
+    rects = game.draw()
+    stats.end('draw')
+
+    stats.begin('flip')
+    if rects is None:
+        pygame.display.flip()
+    elif rects:
+        pygame.display.update(rects)
+    stats.end('flip')
+
+    stats.begin('tick')
+    clock.tick(args.fps)
+    stats.end('tick')
+    stats.end_frame()
+
+if game.pregenerator is not None:
+    game.pregenerator.close()
+
+if args.stats_csv:
+    stats.export_csv(args.stats_csv)
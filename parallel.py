@@ -0,0 +1,111 @@
+"""
+Parallel generation of very large maps from a complete tile set.
+
+Every edge color is a hash of the map seed and the edge's position (see
+World.edge_colors), so the edges along the border between two strips are
+fixed before either strip is generated. The map is cut into horizontal strips
+of strip_rows rows, the strips are filled independently in a process pool and
+written into one grid, or straight into a memory-mapped .npy file for maps
+that don't fit in memory. The result only depends on the seed, never on the
+number of workers or the strip size.
+
+    python parallel.py --width 20000 --height 20000 --seed 0 --out map.npy
+"""
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple
+
+import numpy as np
+import wang
+from World import generate_region
+
+_table: wang.SignatureTable = None
+
+def grid_dtype(table: wang.SignatureTable) -> np.dtype:
+    # big enough for the largest tile index in the table
+    return np.dtype(np.uint8) if table.max_tile < 0xFF else np.dtype(np.uint16)
+
+def init_worker(table: wang.SignatureTable) -> None:
+    global _table
+    _table = table
+
+def generate_strip(seed: int, width: int, y0: int, rows: int, out: str = None) -> Tuple[int, np.ndarray|None]:
+    """
+    Generates rows y0 .. y0+rows-1. With `out` the rows are written into that
+    .npy file and only y0 is returned, otherwise the rows are returned too.
+    """
+    strip = generate_region(_table, seed, 0, y0, width, rows).astype(grid_dtype(_table))
+    if out is None:
+        return y0, strip
+    grid = np.load(out, mmap_mode='r+')
+    grid[y0:y0 + rows] = strip
+    grid.flush()
+    del grid
+    return y0, None
+
+def generate(table: wang.SignatureTable, width: int, height: int, seed: int, workers: int = None,
+             strip_rows: int = 256, out: str = None) -> np.ndarray:
+    """
+    Returns a (height, width) grid of indices into the tile list `table` was built
+    from (see wang.signature_table). With `out` the grid is a memory-mapped .npy
+    file at that path. workers=1 generates in this process.
+    """
+    if not wang.is_complete(table):
+        raise ValueError('Parallel generation needs a complete tile set (every edge signature)!')
+
+    dtype = grid_dtype(table)
+    if out is None:
+        grid = np.empty((height, width), dtype=dtype)
+    else:
+        grid = np.lib.format.open_memmap(out, mode='w+', dtype=dtype, shape=(height, width))
+        grid.flush()
+
+    starts = range(0, height, strip_rows)
+    rows = [min(strip_rows, height - y0) for y0 in starts]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(starts) == 1:
+        init_worker(table)
+        for y0, n in zip(starts, rows):
+            grid[y0:y0 + n] = generate_region(table, seed, 0, y0, width, n)
+        return grid
+
+    n = len(starts)
+    with ProcessPoolExecutor(max_workers=min(workers, n), initializer=init_worker, initargs=(table,)) as pool:
+        for y0, strip in pool.map(generate_strip, [seed] * n, [width] * n, starts, rows, [out] * n):
+            if strip is not None:
+                grid[y0:y0 + len(strip)] = strip
+
+    if out is not None:
+        # pick up what the workers wrote through their own maps
+        grid = np.load(out, mmap_mode='r+')
+    return grid
+
+def main():
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    from Game import Game
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=10000, help='map width in tiles')
+    parser.add_argument('--height', type=int, default=10000, help='map height in tiles')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='map.npy', help='.npy file the tile indices are written to')
+    parser.add_argument('--strip-rows', type=int, default=256, help='rows generated per task')
+    parser.add_argument('--tile-sets', default='./tile_sets')
+    parser.add_argument('--workers', type=int, default=None, help='defaults to the number of CPUs')
+    args = parser.parse_args()
+
+    # only the tile set's signature table is needed, so keep the grid to one cell
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    game = Game(32, 32, tile_sets_dir=os.path.abspath(args.tile_sets), generator_mode='vectorized')
+    game.load_setup('setup.json', save_manifest=False)
+
+    generate(game.tile_signatures, args.width, args.height, args.seed, args.workers, args.strip_rows, args.out)
+    print(args.out)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Headless batch renderer: generates wang tile maps without opening a window and
+writes each one to a PNG.
+
+    python render_maps.py --count 1000 --width 256 --height 256 --seed-start 0 --out-dir maps
+
+Maps are spread over a process pool; every worker loads the tile set once and
+then renders one map per seed.
+"""
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+from Game import Game
+
+_game: Game = None
+
+def init_worker(width: int, height: int, tile_size: int, tile_sets_dir: str, generator_mode: str) -> None:
+    global _game
+    pygame.display.init()
+    # convert()/convert_alpha() in the tile atlas need a display surface
+    pygame.display.set_mode((1, 1))
+    _game = Game(width * tile_size, height * tile_size, tile_w=tile_size, tile_h=tile_size,
+                 tile_sets_dir=tile_sets_dir, generator_mode=generator_mode)
+    # workers share the setup file, so only read the manifest and never rewrite it
+    _game.load_setup('setup.json', save_manifest=False)
+
+def render_map(seed: int, out_dir: str) -> str:
+    _game.reseed(seed)
+    _game.create_wang_tiles()
+    fp = os.path.join(out_dir, f'map_{seed}.png')
+    pygame.image.save(_game.render_grid(), fp)
+    return fp
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=1, help='number of maps to render')
+    parser.add_argument('--width', type=int, default=60, help='map width in tiles')
+    parser.add_argument('--height', type=int, default=30, help='map height in tiles')
+    parser.add_argument('--tile-size', type=int, default=32)
+    parser.add_argument('--seed-start', type=int, default=0, help='maps use seeds seed_start .. seed_start+count-1')
+    parser.add_argument('--out-dir', default='maps')
+    parser.add_argument('--tile-sets', default='./tile_sets')
+    parser.add_argument('--mode', choices=['sequential', 'vectorized'], default='sequential')
+    parser.add_argument('--workers', type=int, default=None, help='defaults to the number of CPUs')
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    seeds = range(args.seed_start, args.seed_start + args.count)
+    init_args = (args.width, args.height, args.tile_size, os.path.abspath(args.tile_sets), args.mode)
+
+    workers = args.workers or os.cpu_count() or 1
+    chunksize = max(1, args.count // (4 * workers))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=init_args) as pool:
+        for fp in pool.map(render_map, seeds, [args.out_dir] * args.count, chunksize=chunksize):
+            print(fp)
+
+if __name__ == '__main__':
+    main()
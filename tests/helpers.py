@@ -0,0 +1,19 @@
+"""
+Small tile sets and checks shared by the tests.
+"""
+import os
+from types import SimpleNamespace
+import numpy as np
+
+TILE_SETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tile_sets')
+
+def make_tiles(sides):
+    return [SimpleNamespace(sides=SimpleNamespace(n=n, e=e, s=s, w=w), weight=1.0) for n, e, s, w in sides]
+
+def complete_sides(colors=2):
+    return [(n, e, s, w) for n in range(colors) for e in range(colors) for s in range(colors) for w in range(colors)]
+
+def assert_edges_match(grid, tiles):
+    sides = np.array([[t.sides.n, t.sides.e, t.sides.s, t.sides.w] for t in tiles])[grid]
+    assert (sides[:, 1:, 3] == sides[:, :-1, 1]).all()
+    assert (sides[1:, :, 0] == sides[:-1, :, 2]).all()
@@ -0,0 +1,15 @@
+import numpy as np
+import classify
+
+def test_kmeans_keeps_palette_order():
+    palette = [(0, 0, 0), (100, 100, 100), (255, 255, 255)]
+    colors = np.array([[0, 0, 0], [255, 255, 255], [100, 100, 100], [2, 2, 2], [250, 250, 250]], dtype=np.float64)
+    ids, out = classify.cluster(colors, palette, k=3)
+    assert ids.tolist() == [0, 2, 1, 0, 2]
+    assert [max(abs(a - b) for a, b in zip(p, q)) <= 5 for p, q in zip(out, palette)] == [True] * 3
+
+def test_kmeans_tops_up_after_palette():
+    colors = np.array([[0, 0, 0], [255, 0, 0], [0, 0, 255], [255, 0, 0]], dtype=np.float64)
+    ids, out = classify.cluster(colors, [(0, 0, 255)], k=3)
+    assert ids[2] == 0
+    assert len(out) == 3 and len(set(ids.tolist())) == 3
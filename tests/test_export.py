@@ -0,0 +1,50 @@
+import numpy as np
+import pygame
+import pytest
+import export
+from helpers import make_tiles, complete_sides
+
+@pytest.mark.parametrize('alpha', [False, True])
+@pytest.mark.parametrize('idat_size', [64, 1 << 20])
+def test_png_writer_decodes_to_same_pixels(tmp_path, alpha, idat_size):
+    width, height = 37, 23
+    fmt = 'RGBA' if alpha else 'RGB'
+    pixels = np.random.default_rng(0).integers(0, 256, size=width * height * len(fmt), dtype=np.uint8).tobytes()
+    path = str(tmp_path / 'out.png')
+    with export.PngWriter(path, width, height, alpha, idat_size=idat_size) as png:
+        # in uneven batches of rows
+        stride = width * len(fmt)
+        png.write_rows(pixels[:5 * stride])
+        png.write_rows(pixels[5 * stride:])
+
+    image = pygame.image.load(path)
+    assert image.get_size() == (width, height)
+    assert pygame.image.tobytes(image, fmt) == pixels
+
+def test_png_writer_rejects_partial_rows_and_missing_rows(tmp_path):
+    png = export.PngWriter(str(tmp_path / 'out.png'), 4, 2)
+    with pytest.raises(ValueError):
+        png.write_rows(b'\0' * 5)
+    png.write_rows(b'\0' * 12)
+    with pytest.raises(ValueError):
+        png.close()
+
+def test_write_png_matches_blitted_grid(tmp_path):
+    tile_w, tile_h = 3, 2
+    tiles = make_tiles(complete_sides())
+    for i, t in enumerate(tiles):
+        t.surface = pygame.Surface((tile_w, tile_h))
+        t.surface.fill((i * 16, 255 - i * 16, i * 7))
+    # the last cell is past the end of tiles, an empty cell
+    grid = np.random.default_rng(1).integers(0, len(tiles), size=(5, 7))
+    grid[-1, -1] = 0xFF
+
+    path = str(tmp_path / 'map.png')
+    export.write_png(path, grid, tiles, tile_w, tile_h)
+
+    expected = pygame.Surface((7 * tile_w, 5 * tile_h))
+    expected.fill((0, 0, 0))
+    for (y, x), ti in np.ndenumerate(grid):
+        if ti < len(tiles):
+            expected.blit(tiles[ti].surface, (x * tile_w, y * tile_h))
+    assert pygame.image.tobytes(pygame.image.load(path), 'RGB') == pygame.image.tobytes(expected, 'RGB')
@@ -0,0 +1,32 @@
+import pygame
+import pytest
+from FrameStats import FrameStats
+from Game import Game
+from helpers import TILE_SETS
+
+@pytest.mark.parametrize('pregenerate_depth', [0, 1])
+def test_solver_runs_show_up_in_overlay_and_csv(tmp_path, pregenerate_depth):
+    pygame.display.init()
+    pygame.display.set_mode((64, 64))
+    game = Game(8 * 32, 4 * 32, tile_sets_dir=TILE_SETS, generator_mode='solver', pregenerate_depth=pregenerate_depth)
+    game.stats = FrameStats()
+    game.load_setup(str(tmp_path / 'setup.json'), save_manifest=False)
+    # the first grid was solved during setup
+    assert game.stats.counts['solved_cells'][game.stats.slot] == 32
+    game.stats.end_frame()
+    try:
+        game.next_grid()
+    finally:
+        if game.pregenerator is not None:
+            game.pregenerator.close()
+
+    stats = game.stats
+    assert stats.counts['solved_cells'][stats.slot] == 32
+    assert stats.solver_cells_per_sec == pytest.approx(game.solver_stats.cells_per_sec)
+    assert any(line.startswith('solver ') for line in stats.lines())
+
+    stats.end_frame()
+    path = tmp_path / 'stats.csv'
+    stats.export_csv(str(path))
+    header, *_, row = path.read_text().splitlines()
+    assert dict(zip(header.split(','), row.split(',')))['solved_cells'] == '32'
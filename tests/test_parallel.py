@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+import parallel
+import wang
+from helpers import make_tiles, complete_sides, assert_edges_match
+
+@pytest.fixture
+def tiles():
+    return make_tiles(complete_sides())
+
+@pytest.mark.parametrize('workers, strip_rows', [(2, 7), (3, 64), (4, 500)])
+def test_same_grid_for_any_workers_and_strips(tiles, workers, strip_rows):
+    table = wang.signature_table(tiles)
+    expected = parallel.generate(table, 97, 61, seed=42, workers=1, strip_rows=16)
+    grid = parallel.generate(table, 97, 61, seed=42, workers=workers, strip_rows=strip_rows)
+    assert (grid == expected).all()
+    assert_edges_match(grid, tiles)
+
+def test_memmap_output_matches(tiles, tmp_path):
+    table = wang.signature_table(tiles)
+    expected = parallel.generate(table, 50, 40, seed=7, workers=1)
+    out = str(tmp_path / 'map.npy')
+    parallel.generate(table, 50, 40, seed=7, workers=2, strip_rows=9, out=out)
+    assert (np.load(out) == expected).all()
+
+def test_tile_indices_past_255_survive(tmp_path):
+    # 290 copies of one signature, then the remaining signatures at 290..305
+    sides = [(0, 0, 0, 0)] * 290 + complete_sides()
+    tiles = make_tiles(sides)
+    table = wang.signature_table(tiles)
+    assert table.max_tile == 305
+    for workers in (1, 2):
+        grid = parallel.generate(table, 40, 30, seed=1, workers=workers, strip_rows=8)
+        assert grid.dtype == np.uint16
+        assert int(grid.max()) == 305
+        assert_edges_match(grid, tiles)
@@ -0,0 +1,86 @@
+from random import Random
+import numpy as np
+import pygame
+import pytest
+from Game import Game
+from helpers import TILE_SETS, assert_edges_match
+
+TILE = 32
+
+def make_game(tmp_path, tile_count):
+    pygame.display.init()
+    pygame.display.set_mode((64, 64))
+    game = Game(10 * TILE, 6 * TILE, tile_sets_dir=TILE_SETS, tile_count=tile_count, pregenerate_depth=0, seed=3)
+    game.screen = pygame.display.get_surface()
+    game.load_setup(str(tmp_path / 'setup.json'), save_manifest=False)
+    return game
+
+# the full set, and one missing signatures, so filling new cells needs the solver
+@pytest.mark.parametrize('tile_count', [16, 8])
+def test_random_resizes_keep_edges_and_tiles(tmp_path, tile_count):
+    game = make_game(tmp_path, tile_count)
+    regenerated = []
+    create_wang_tiles = game.create_wang_tiles
+    game.create_wang_tiles = lambda: (regenerated.append(True), create_wang_tiles())
+
+    rng = Random(tile_count)
+    for _ in range(60):
+        old = game.grid_view().copy()
+        archive = dict(game.grid_archive)
+        regenerated.clear()
+        w, h = rng.randrange(1, 16), rng.randrange(1, 12)
+        game.resize(w * TILE + rng.randrange(TILE), h * TILE + rng.randrange(TILE))
+
+        grid = game.grid_view()
+        assert grid.shape == (h, w)
+        assert (grid < len(game.tiles)).all()
+        assert_edges_match(grid, game.tiles)
+        if regenerated:
+            # the solver couldn't fit tiles around the kept ones, everything is new
+            continue
+        keep_h, keep_w = min(h, old.shape[0]), min(w, old.shape[1])
+        assert (grid[:keep_h, :keep_w] == old[:keep_h, :keep_w]).all()
+        for (x, y), ti in archive.items():
+            if x < w and y < h and not (x < keep_w and y < keep_h):
+                assert grid[y, x] == ti
+        game.draw()
+
+def test_highlights_follow_their_cells(tmp_path):
+    game = make_game(tmp_path, 16)
+    game.resize(60 * TILE, 30 * TILE)
+    game.check_tile_north = 28 * 60 + 59
+    game.check_tile_west = 29 * 60 + 2
+    game.resize(59 * TILE, 30 * TILE)
+    assert game.check_tile_north is None
+    assert game.check_tile_west == 29 * 59 + 2
+    game.draw()
+
+@pytest.mark.parametrize('size', [(20, 500), (900, 15), (5, 5)])
+def test_screen_smaller_than_a_tile(tmp_path, size):
+    game = make_game(tmp_path, 16)
+    game.resize(*size)
+    assert game.tile_count_w >= 1 and game.tile_count_h >= 1
+    game.draw()
+    game.next_grid()
+    game.draw()
+    # background jobs can still be asked for an empty grid
+    assert len(game.generate_grid(4, 0, Random(0), np.random.default_rng(0)).grid_tiles) == 0
+
+def test_pregenerated_grids_follow_resizes(tmp_path):
+    pygame.display.init()
+    pygame.display.set_mode((64, 64))
+    game = Game(10 * TILE, 6 * TILE, tile_sets_dir=TILE_SETS, pregenerate_depth=2, seed=3)
+    game.screen = pygame.display.get_surface()
+    game.load_setup(str(tmp_path / 'setup.json'), save_manifest=False)
+    regenerated = []
+    create_wang_tiles = game.create_wang_tiles
+    game.create_wang_tiles = lambda: (regenerated.append(True), create_wang_tiles())
+    try:
+        for w, h in [(7, 4), (12, 9), (1, 1), (5, 0), (9, 3)]:
+            game.resize(w * TILE, h * TILE)
+            game.next_grid()
+            assert game.grid_view().shape == (max(1, h), w)
+            assert_edges_match(game.grid_view(), game.tiles)
+        assert not regenerated
+    finally:
+        game.pregenerator.close()
@@ -0,0 +1,91 @@
+import os
+import shutil
+from json import dumps, loads
+import numpy as np
+import pygame
+import pytest
+from Game import Game, TILE_WEIGHTS_FILE
+from helpers import TILE_SETS
+
+def load(tile_sets_dir, setup_file, save_manifest=True):
+    pygame.display.init()
+    pygame.display.set_mode((64, 64))
+    game = Game(64, 64, tile_sets_dir=str(tile_sets_dir), pregenerate_depth=0)
+    game.load_setup(str(setup_file), save_manifest)
+    return game
+
+@pytest.fixture
+def tile_sets(tmp_path):
+    # a copy, so tests can touch and add files
+    path = tmp_path / 'tile_sets'
+    shutil.copytree(TILE_SETS, path)
+    return path
+
+@pytest.mark.parametrize('contents', ['', '{', '[]', '3', 'null'])
+def test_unusable_setup_file_is_rewritten(tmp_path, contents):
+    setup_file = tmp_path / 'setup.json'
+    setup_file.write_text(contents)
+    game = load(TILE_SETS, setup_file)
+    data = loads(setup_file.read_text())
+    assert data['tile_sets_dir'] == TILE_SETS
+    assert len(data['tiles']) == len(game.tiles)
+
+def test_manifest_reclassifies_only_changed_tiles(tmp_path, tile_sets, monkeypatch):
+    classified = []
+    classify_tiles = Game.classify_tiles
+    def spy(self, tile_indices, images=None):
+        classified.append(list(tile_indices))
+        classify_tiles(self, tile_indices, images)
+    monkeypatch.setattr(Game, 'classify_tiles', spy)
+    setup_file = tmp_path / 'setup.json'
+
+    first = load(tile_sets, setup_file)
+    assert classified == [list(range(16))]
+    sides = [(t.sides.n, t.sides.e, t.sides.s, t.sides.w) for t in first.tiles]
+
+    classified.clear()
+    mtime = setup_file.stat().st_mtime_ns
+    second = load(tile_sets, setup_file)
+    assert classified == [[]]
+    assert [(t.sides.n, t.sides.e, t.sides.s, t.sides.w) for t in second.tiles] == sides
+    # nothing changed, so the manifest isn't rewritten
+    assert setup_file.stat().st_mtime_ns == mtime
+
+    classified.clear()
+    stat = os.stat(tile_sets / '5.png')
+    os.utime(tile_sets / '5.png', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    third = load(tile_sets, setup_file)
+    assert classified == [[5]]
+    assert [(t.sides.n, t.sides.e, t.sides.s, t.sides.w) for t in third.tiles] == sides
+    assert loads(setup_file.read_text())['tiles'][str(tile_sets / '5.png')]['mtime_ns'] == stat.st_mtime_ns + 10**9
+
+def test_weights_come_from_the_tile_set(tmp_path, tile_sets):
+    (tile_sets / TILE_WEIGHTS_FILE).write_text(dumps({'3.png': 4, '7.png': 0.5}))
+    setup_file = tmp_path / 'setup.json'
+    game = load(tile_sets, setup_file)
+    assert [t.weight for t in game.tiles][:8] == [1, 1, 1, 4, 1, 1, 1, 0.5]
+
+    # reclassifying a changed tile, or dropping the cache, keeps its weight
+    stat = os.stat(tile_sets / '3.png')
+    os.utime(tile_sets / '3.png', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert load(tile_sets, setup_file).tiles[3].weight == 4
+    setup_file.unlink()
+    assert load(tile_sets, setup_file).tiles[3].weight == 4
+
+@pytest.mark.parametrize('contents', ['{', '[1, 2]', '{"3.png": "heavy"}', '{"3.png": -1}'])
+def test_bad_weights_file_is_an_error(tmp_path, tile_sets, contents):
+    (tile_sets / TILE_WEIGHTS_FILE).write_text(contents)
+    with pytest.raises(ValueError):
+        load(tile_sets, tmp_path / 'setup.json')
+
+@pytest.mark.parametrize('weight', [0, 9])
+def test_sequential_generator_uses_weights(tmp_path, tile_sets, weight):
+    (tile_sets / TILE_WEIGHTS_FILE).write_text(dumps({'0.png': weight}))
+    game = load(tile_sets, tmp_path / 'setup.json')
+    game.resize(40 * 32, 40 * 32)
+    game.create_wang_tiles()
+    counts = np.bincount(game.grid_view().ravel(), minlength=len(game.tiles))
+    if weight == 0:
+        assert counts[0] == 0
+    else:
+        assert counts[0] > 3 * counts[1:].mean()
@@ -0,0 +1,30 @@
+from random import Random
+import numpy as np
+import pytest
+from Solver import Solver
+from helpers import make_tiles, complete_sides, assert_edges_match
+
+@pytest.mark.parametrize('missing', [(0,), (3, 12), (1, 2, 4, 8), (5, 6, 9, 10)])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_incomplete_set_solves_with_matching_edges(missing, seed):
+    sides = [s for i, s in enumerate(complete_sides()) if i not in missing]
+    tiles = make_tiles(sides)
+    solver = Solver(tiles, Random(seed))
+    cells = solver.solve(23, 17)
+    grid = np.array(cells).reshape(17, 23)
+    assert ((grid >= 0) & (grid < len(tiles))).all()
+    assert_edges_match(grid, tiles)
+
+def test_three_colors_with_variants():
+    sides = complete_sides(3)[::2] + [(0, 0, 0, 0), (1, 1, 1, 1)]
+    tiles = make_tiles(sides)
+    grid = np.array(Solver(tiles, Random(4)).solve(15, 15)).reshape(15, 15)
+    assert_edges_match(grid, tiles)
+
+def test_unsolvable_set_raises():
+    # nothing can sit below a tile whose south edge no north edge matches
+    tiles = make_tiles([(0, 0, 1, 0)])
+    with pytest.raises(ValueError):
+        Solver(tiles, Random(0), max_backtracks=10, max_restarts=1).solve(3, 3)
+    # fine as long as there's no cell below it
+    assert Solver(tiles, Random(0)).solve(3, 1) == [0, 0, 0]
@@ -0,0 +1,55 @@
+import os
+import pygame
+import pytest
+import tilepack
+from Game import Game
+from helpers import TILE_SETS
+
+@pytest.fixture
+def game(tmp_path):
+    pygame.display.init()
+    pygame.display.set_mode((64, 64))
+    game = Game(64, 64, tile_sets_dir=TILE_SETS, pregenerate_depth=0)
+    game.load_setup(str(tmp_path / 'setup.json'), save_manifest=False)
+    return game
+
+def sides(tiles):
+    return [(t.sides.n, t.sides.e, t.sides.s, t.sides.w) for t in tiles]
+
+@pytest.mark.parametrize('pixel_format', ['BGRA', 'RGBA', 'RGB'])
+def test_round_trip_matches_loose_pngs(game, tmp_path, pixel_format):
+    path = str(tmp_path / 'tiles.pack')
+    tilepack.write(path, game.tiles, game.edge_palette, game.tile_w, game.tile_h, pixel_format, TILE_SETS)
+    pack = tilepack.load(path)
+
+    assert pack.tile_count == len(game.tiles)
+    assert pack.sides == sides(game.tiles)
+    assert pack.weights == [t.weight for t in game.tiles]
+    assert pack.palette == game.edge_palette
+    assert pack.names == [os.path.basename(t.filepath) for t in game.tiles]
+
+    # compare in the pack's channels, RGB packs have no alpha to compare
+    fmt = 'RGBA' if pixel_format in tilepack.ALPHA_FORMATS else 'RGB'
+    atlas = pack.atlas()
+    for i, name in enumerate(pack.names):
+        loose = pygame.image.load(os.path.join(TILE_SETS, name))
+        assert pygame.image.tobytes(atlas.subsurface(pack.rect(i)), fmt) == pygame.image.tobytes(loose, fmt)
+
+def test_game_loads_pack_like_loose_tiles(game, tmp_path):
+    path = str(tmp_path / 'tiles.pack')
+    tilepack.write(path, game.tiles, game.edge_palette, game.tile_w, game.tile_h, source=TILE_SETS)
+    packed = Game(64, 64, tile_sets_dir=TILE_SETS, pregenerate_depth=0, tile_pack_path=path)
+    packed.load_setup(str(tmp_path / 'setup.json'), save_manifest=False)
+
+    assert sides(packed.tiles) == sides(game.tiles)
+    assert [t.filepath for t in packed.tiles] == [t.filepath for t in game.tiles]
+    for a, b in zip(packed.tiles, game.tiles):
+        assert pygame.image.tobytes(a.surface, 'RGBA') == pygame.image.tobytes(b.surface, 'RGBA')
+
+def test_truncated_pack_is_rejected(game, tmp_path):
+    path = str(tmp_path / 'tiles.pack')
+    tilepack.write(path, game.tiles, game.edge_palette, game.tile_w, game.tile_h)
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 1)
+    with pytest.raises(ValueError):
+        tilepack.load(path)
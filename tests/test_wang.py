@@ -0,0 +1,29 @@
+import numpy as np
+import wang
+from World import generate_region
+from helpers import make_tiles, complete_sides, assert_edges_match
+
+def test_variants_are_placed_by_weight():
+    # a second (0, 0, 0, 0) tile at index 16, weighted 3:1 over the first
+    tiles = make_tiles(complete_sides() + [(0, 0, 0, 0)])
+    tiles[16].weight = 3.0
+    table = wang.signature_table(tiles)
+    assert table.max_count == 2 and wang.is_complete(table)
+
+    grid = wang.generate_edge_grid(table, 200, 200, np.random.default_rng(0))
+    assert_edges_match(grid, tiles)
+    first, variant = (grid == 0).sum(), (grid == 16).sum()
+    assert 2.5 < variant / first < 3.5
+
+def test_zero_weight_is_never_placed():
+    tiles = make_tiles(complete_sides() + [(0, 0, 0, 0)])
+    tiles[0].weight = 0.0
+    table = wang.signature_table(tiles)
+    grid = generate_region(table, 5, -20, -20, 80, 80)
+    assert_edges_match(grid, tiles)
+    assert (grid == 16).any() and not (grid == 0).any()
+
+def test_missing_signature_picks_nothing():
+    table = wang.signature_table(make_tiles(complete_sides()[1:]))
+    assert not wang.is_complete(table)
+    assert table.pick(np.array([0, 1, 15])).tolist() == [-1, 0, 14]
@@ -0,0 +1,168 @@
+"""
+Tile packs: a whole tile set in one binary file that loads with a memory map
+instead of decoding a PNG per tile.
+
+Layout, little-endian:
+
+    header      HEADER, see below
+    tile table  per tile: n, e, s, w edge color ids (uint8) and weight (float32)
+    metadata    UTF-8 JSON: tile file names, edge palette and source directory
+    pixels      the tile atlas (cols x rows tiles, same layout as
+                Game.build_tile_atlas) as tightly packed rows in pixel_format,
+                one of pygame.image.frombuffer's formats; starts on a
+                PIXEL_ALIGN boundary
+
+Build a pack from a tile set directory (classifying the edges on the way):
+
+    python tilepack.py ./tile_sets tiles.pack
+"""
+import os
+import math
+import mmap
+import struct
+import argparse
+from dataclasses import dataclass
+from json import loads, dumps
+from typing import List, Tuple
+
+import pygame
+
+MAGIC = b'WTPK'
+VERSION = 1
+# magic, version, tile count, tile w, tile h, atlas cols, atlas rows, pixel format,
+# palette size, metadata offset, metadata length, pixels offset, pixels length
+HEADER = struct.Struct('<4sHIHHHH4sIQQQQ')
+TILE = struct.Struct('<4Bf')
+PIXEL_ALIGN = 64
+# pixel formats with an alpha channel
+ALPHA_FORMATS = ('RGBA', 'BGRA', 'ARGB')
+
+@dataclass
+class TilePack:
+    tile_w: int
+    tile_h: int
+    cols: int
+    rows: int
+    pixel_format: str
+    # (n, e, s, w) per tile
+    sides: List[Tuple[int, int, int, int]]
+    weights: List[float]
+    names: List[str]
+    palette: List[Tuple[int, int, int]]
+    source: str
+    # the atlas pixels, a view into the memory map
+    pixels: memoryview
+
+    @property
+    def tile_count(self) -> int:
+        return len(self.sides)
+
+    def atlas(self) -> pygame.Surface:
+        """
+        Returns the atlas as a surface sharing memory with the pack; keep the pack
+        (or a converted copy of the surface) around for as long as it's used.
+        """
+        return pygame.image.frombuffer(self.pixels, (self.cols * self.tile_w, self.rows * self.tile_h), self.pixel_format)
+
+    def rect(self, i: int) -> pygame.Rect:
+        return pygame.Rect((i % self.cols) * self.tile_w, (i // self.cols) * self.tile_h, self.tile_w, self.tile_h)
+
+def write(path: str, tiles: List, palette: List[Tuple[int, int, int]], tile_w: int, tile_h: int,
+          pixel_format: str = 'BGRA', source: str = '') -> None:
+    """
+    Writes `tiles` (anything with surface, sides, filepath and weight, like
+    Game.tiles) and the edge palette their sides index into to a pack at `path`.
+    """
+    cols = max(1, math.ceil(math.sqrt(len(tiles))))
+    rows = max(1, (len(tiles) + cols - 1) // cols)
+    atlas = pygame.Surface((cols * tile_w, rows * tile_h), pygame.SRCALPHA)
+    for i, t in enumerate(tiles):
+        atlas.blit(t.surface, ((i % cols) * tile_w, (i // cols) * tile_h))
+    pixels = pygame.image.tobytes(atlas, pixel_format)
+
+    table = b''.join(TILE.pack(t.sides.n, t.sides.e, t.sides.s, t.sides.w, t.weight) for t in tiles)
+    meta = dumps({
+        'names': [os.path.basename(t.filepath) for t in tiles],
+        'palette': [list(c) for c in palette],
+        'source': source,
+    }).encode('utf-8')
+
+    meta_offset = HEADER.size + len(table)
+    pixels_offset = -(-(meta_offset + len(meta)) // PIXEL_ALIGN) * PIXEL_ALIGN
+    header = HEADER.pack(MAGIC, VERSION, len(tiles), tile_w, tile_h, cols, rows, pixel_format.encode('ascii'),
+                         len(palette), meta_offset, len(meta), pixels_offset, len(pixels))
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(table)
+        f.write(meta)
+        f.write(b'\0' * (pixels_offset - meta_offset - len(meta)))
+        f.write(pixels)
+    os.replace(tmp_path, path)
+
+def load(path: str) -> TilePack:
+    """
+    Memory-maps the pack at `path`. Only the header, tile table and metadata are
+    read up front; the pixels are paged in when the atlas is first used.
+    """
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(data) < HEADER.size:
+        raise ValueError(f'{path} is too short to be a tile pack!')
+    (magic, version, count, tile_w, tile_h, cols, rows, pixel_format,
+     palette_size, meta_offset, meta_length, pixels_offset, pixels_length) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a tile pack!')
+    if version != VERSION:
+        raise ValueError(f'{path} is a version {version} tile pack, expected version {VERSION}!')
+    pixel_format = pixel_format.rstrip(b'\0').decode('ascii')
+    if pixels_offset + pixels_length > len(data) or pixels_length != cols * tile_w * rows * tile_h * len(pixel_format):
+        raise ValueError(f'{path} is truncated or corrupt!')
+
+    sides = []
+    weights = []
+    for n, e, s, w, weight in TILE.iter_unpack(data[HEADER.size:HEADER.size + count * TILE.size]):
+        sides.append((n, e, s, w))
+        weights.append(weight)
+    meta = loads(data[meta_offset:meta_offset + meta_length].decode('utf-8'))
+    palette = [tuple(c) for c in meta['palette']]
+    if len(palette) != palette_size:
+        raise ValueError(f'{path} is truncated or corrupt!')
+
+    return TilePack(tile_w, tile_h, cols, rows, pixel_format, sides, weights, meta['names'], palette,
+                    meta.get('source', ''), memoryview(data)[pixels_offset:pixels_offset + pixels_length])
+
+def main():
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    from Game import Game
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('tile_sets', help='directory holding the tiles as 0.png, 1.png, ...')
+    parser.add_argument('out', help='pack file to write')
+    parser.add_argument('--tile-size', type=int, default=32)
+    parser.add_argument('--format', default='BGRA', choices=['RGBA', 'BGRA', 'ARGB', 'RGBX', 'RGB', 'BGR'],
+                        help="pixel layout; BGRA matches most displays, so loading doesn't have to swizzle")
+    parser.add_argument('--edge-colors', type=int, default=None, help='force this many edge colors')
+    args = parser.parse_args()
+
+    count = 0
+    while os.path.exists(os.path.join(args.tile_sets, f'{count}.png')):
+        count += 1
+    if count == 0:
+        parser.error(f'no tiles (0.png, 1.png, ...) in {args.tile_sets}')
+
+    # the tiles are classified the same way the game does it, and stored with the result
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    game = Game(args.tile_size, args.tile_size, tile_w=args.tile_size, tile_h=args.tile_size, tile_count=count,
+                tile_sets_dir=args.tile_sets, edge_color_count=args.edge_colors)
+    game.load_setup('setup.json', save_manifest=False)
+
+    write(args.out, game.tiles, game.edge_palette, game.tile_w, game.tile_h, args.format, args.tile_sets)
+    print(f'{args.out}: {count} tiles, {len(game.edge_palette)} edge colors')
+
+if __name__ == '__main__':
+    main()
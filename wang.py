@@ -0,0 +1,125 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List
+import numpy as np
+
+# A tile's signature packs its (n, e, s, w) edge color ids into one integer,
+# most significant digit first, in base `colors`. With 2 colors this is the
+# usual 4-bit n/e/s/w mask.
+
+def signature(n: int, e: int, s: int, w: int, colors: int = 2) -> int:
+    return ((n * colors + e) * colors + s) * colors + w
+
+@dataclass
+class SignatureTable:
+    """
+    Every tile with a given (n, e, s, w) signature, grouped by signature:
+    tiles[offsets[sig]:offsets[sig + 1]] are the candidates for `sig`, and
+    cum_weights holds their weights as a running fraction of the group's total,
+    so a uniform draw u picks the first candidate whose cum_weights is > u.
+    """
+    colors: int
+    offsets: np.ndarray
+    tiles: np.ndarray
+    cum_weights: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def max_count(self) -> int:
+        return int(self.counts.max())
+
+    @property
+    def max_tile(self) -> int:
+        return int(self.tiles.max()) if len(self.tiles) else -1
+
+    def pick(self, sig: np.ndarray, u: np.ndarray = None) -> np.ndarray:
+        """
+        Returns a tile index for every signature in `sig`, or -1 where there is
+        none. Where a signature has several tiles, `u` (uniform draws in [0, 1),
+        same shape as `sig`) chooses among them by weight; without it the first
+        one is used.
+        """
+        if not len(self.tiles):
+            return np.full(sig.shape, -1, dtype=np.int32)
+        start = self.offsets[sig]
+        count = self.offsets[1:][sig] - start
+        if u is not None and self.max_count > 1:
+            # walk each cell along its group until the running weight passes u
+            left = count - 1
+            for _ in range(self.max_count - 1):
+                step = (left > 0) & (u >= self.cum_weights[np.minimum(start, len(self.tiles) - 1)])
+                start += step
+                left -= step
+        return np.where(count > 0, self.tiles[np.minimum(start, len(self.tiles) - 1)], -1)
+
+def signature_table(tiles: List, colors: int = 2) -> SignatureTable:
+    """
+    Groups the tiles in `tiles` by signature, with their weights (Tile.weight,
+    1 if unset). A group whose weights add up to nothing is picked from evenly.
+    """
+    groups = [[] for _ in range(colors ** 4)]
+    for i, t in enumerate(tiles):
+        groups[signature(t.sides.n, t.sides.e, t.sides.s, t.sides.w, colors)].append(i)
+
+    offsets = np.zeros(len(groups) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(g) for g in groups])
+    members = np.array([i for g in groups for i in g], dtype=np.int32)
+    cum_weights = np.empty(len(members), dtype=np.float64)
+    for sig, g in enumerate(groups):
+        weights = np.array([max(0.0, getattr(tiles[i], 'weight', 1.0)) for i in g], dtype=np.float64)
+        if weights.sum() <= 0:
+            weights[:] = 1.0
+        cum_weights[offsets[sig]:offsets[sig + 1]] = np.cumsum(weights) / weights.sum()
+    return SignatureTable(colors, offsets, members, cum_weights)
+
+def is_complete(table: SignatureTable) -> bool:
+    return bool((table.counts > 0).all())
+
+def generate_edge_grid(table: SignatureTable, width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Fills a width x height grid in one go by sampling every edge color up front.
+
+    With a complete set any combination of edges has a matching tile, so instead
+    of walking the grid cell by cell we pick all horizontal and vertical edges at
+    random and turn each cell's four edges into a signature.
+
+    Returns a (height, width) array of indices into the tile list `table` was built from.
+    """
+    if not is_complete(table):
+        raise ValueError('Vectorized generation needs a complete tile set (every edge signature)!')
+
+    colors = table.colors
+
+    # horz[y, x] is the edge above cell (x, y), vert[y, x] the edge left of it
+    horz = rng.integers(0, colors, size=(height + 1, width), dtype=np.uint8)
+    vert = rng.integers(0, colors, size=(height, width + 1), dtype=np.uint8)
+    # only needed to choose between tiles sharing a signature
+    u = rng.random((height, width)) if table.max_count > 1 else None
+
+    return tiles_from_edges(table, horz, vert, u)
+
+def tiles_from_edges(table: SignatureTable, horz: np.ndarray, vert: np.ndarray, u: np.ndarray = None) -> np.ndarray:
+    """
+    Maps edge colors to tile indices. `horz` is (h+1, w) and holds the edge above
+    each cell (the last row being the bottom edges), `vert` is (h, w+1) and holds
+    the edge left of each cell (the last column being the right edges). `u`
+    picks among tiles sharing a signature, see SignatureTable.pick.
+    """
+    colors = table.colors
+    dtype = np.uint8 if len(table) <= 0x100 else np.uint32
+
+    sig = horz[:-1, :].astype(dtype)
+    sig *= colors
+    sig += vert[:, 1:]
+    sig *= colors
+    sig += horz[1:, :]
+    sig *= colors
+    sig += vert[:, :-1]
+
+    return table.pick(sig, u)